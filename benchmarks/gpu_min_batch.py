@@ -0,0 +1,88 @@
+"""
+Find the batch size above which InferencePipeline's GPU path beats the CPU one.
+
+Times the same calls predict_batch makes: four CPU boosters predicting a host
+array concurrently, against one CuPy host-to-device copy, four GPU
+inplace_predicts and the copies back. Set GPU_MIN_BATCH to the reported
+crossover.
+
+    python benchmarks/gpu_min_batch.py [--device cuda:0]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+
+N_FEATURES = 15  # InferencePipeline.feature_cols
+TARGETS = ("N", "P", "K", "pH")
+SIZES = (1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 1_000_000)
+
+
+def train_booster(seed: int) -> xgb.Booster:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(20_000, N_FEATURES)).astype(np.float32)
+    y = X @ rng.normal(size=N_FEATURES) + rng.normal(scale=0.1, size=len(X))
+    params = {"max_depth": 6, "eta": 0.05, "tree_method": "hist", "nthread": os.cpu_count()}
+    return xgb.train(params, xgb.QuantileDMatrix(X, y), num_boost_round=300)
+
+
+def best_of(fn, repeats: int = 5) -> float:
+    fn()  # warm caches and CUDA context
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--device", default="cuda:0")
+    args = parser.parse_args()
+
+    import cupy as cp
+
+    cpu_models = [train_booster(seed) for seed in range(len(TARGETS))]
+    nthread = max(1, (os.cpu_count() or 1) // len(TARGETS))
+    for booster in cpu_models:
+        booster.set_param({"device": "cpu", "nthread": nthread})
+
+    gpu_models = [booster.copy() for booster in cpu_models]
+    for booster in gpu_models:
+        booster.set_param({"device": args.device})
+
+    pool = ThreadPoolExecutor(max_workers=len(TARGETS))
+    rng = np.random.default_rng(0)
+
+    def cpu(X):
+        return list(pool.map(lambda b: b.inplace_predict(X), cpu_models))
+
+    def gpu(X):
+        X_gpu = cp.asarray(X)
+        out = [cp.asnumpy(b.inplace_predict(X_gpu)) for b in gpu_models]
+        cp.cuda.Stream.null.synchronize()
+        return out
+
+    crossover = None
+    print(f"{'rows':>10} {'cpu ms':>10} {'gpu ms':>10} {'speedup':>8}")
+    for n in SIZES:
+        X = np.ascontiguousarray(rng.normal(size=(n, N_FEATURES)), dtype=np.float32)
+        np.testing.assert_allclose(cpu(X)[0], gpu(X)[0], rtol=1e-4, atol=1e-4)
+
+        t_cpu, t_gpu = best_of(lambda: cpu(X)), best_of(lambda: gpu(X))
+        print(f"{n:>10} {t_cpu * 1e3:>10.2f} {t_gpu * 1e3:>10.2f} {t_cpu / t_gpu:>7.2f}x")
+        if crossover is None and t_gpu < t_cpu:
+            crossover = n
+
+    if crossover is None:
+        print("\nGPU never beat CPU here; leave XGB_DEVICE=cpu")
+    else:
+        print(f"\nGPU wins from ~{crossover} rows: GPU_MIN_BATCH={crossover}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,49 @@
+import os
+from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from src.chemical_analysis.api.routes import router as chemical_analysis_router
+from src.chemical_analysis.api.functions import predict_batcher, get_inference_pipeline
 from src.predict_toxicity.api.routes.facilities import router as facilities_router
 from src.predict_toxicity.api.routes.meteorological import router as meteo_router
-from src.predict_toxicity.api.routes.simulation import router as simulation_router
+from src.predict_toxicity.api.routes.simulation import router as simulation_router, simulation_executor
 from src.predict_toxicity.api.routes.terrain import router as terrain_router
-from src.DisplacementDetector.api import router as displacement_router
+from src.DisplacementDetector.api import router as displacement_router, get_predictor, coordinate_batcher
+from src.DisplacementDetector import config as displacement_config
+from src.predict_toxicity.config.settings import ensure_data_dirs
+from src.logging import logging
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # sync routes and background tasks (XGBoost, EGMS lookups) share this pool
+    to_thread.current_default_thread_limiter().total_tokens = int(
+        os.getenv("THREADPOOL_SIZE", "100")
+    )
+    ensure_data_dirs()
+    predict_batcher.start()
+    coordinate_batcher.start()
+    # load the EGMS forecaster once here instead of on the first request
+    if displacement_config.MODEL_PATH.exists():
+        get_predictor()
+    if os.path.exists("artifacts/preprocessor.joblib"):
+        # a bad chemical-analysis artifact must not keep the other routers
+        # down; the pipeline stays unloaded and the first request reports it
+        try:
+            await to_thread.run_sync(lambda: get_inference_pipeline().warmup())
+        except Exception:
+            logging.exception("Inference pipeline warmup failed; chemical analysis will retry on first request")
+    yield
+    await predict_batcher.stop()
+    await coordinate_batcher.stop()
+    simulation_executor.shutdown(wait=False, cancel_futures=True)
 
 app = FastAPI(
     title="Agri-Logic & Toxicity Prediction API",
     version="1.0.0",
     description="Soil Chemical Analysis & Industrial Disaster Simulation APIs",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Chemical Analysis Routes
@@ -32,4 +66,18 @@ async def root():
         "message": "Agri-Logic & Toxicity Prediction API",
         "docs": "/docs",
         "health": "/health"
-    }
\ No newline at end of file
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # task stores live in process memory, so keep one worker unless results
+    # are polled through a sticky load balancer
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    )
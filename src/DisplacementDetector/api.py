@@ -1,13 +1,19 @@
+from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime
 import uuid
 
+import numpy as np
 import pandas as pd
 from fastapi import APIRouter, BackgroundTasks, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from pyproj import Transformer
 
+from src.batcher import DynamicBatcher
+from src.task_store import TaskStore
+from src.DisplacementDetector import config
 from src.DisplacementDetector.data_processor import DataProcessor
 from src.DisplacementDetector.velocityCalculator import VelocityCalculator
 from src.DisplacementDetector.ml_predictor import DisplacementPredictor
@@ -21,9 +27,19 @@ processor: DataProcessor | None = None
 predictor: DisplacementPredictor | None = None
 calculator = VelocityCalculator()
 
-task_store: Dict[str, Dict] = {}
 to_egms = Transformer.from_crs("EPSG:4326", "EPSG:3035", always_xy=True)
 
+
+def transform_coordinates(lon_lats: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    lons, lats = np.array(lon_lats, dtype=np.float64).T
+    eastings, northings = to_egms.transform(lons, lats)
+    return list(zip(eastings.tolist(), northings.tolist()))
+
+
+# concurrent requests share one vectorised PROJ call
+coordinate_batcher = DynamicBatcher(transform_coordinates, max_batch_size=256, max_delay=0.002)
+
+
 def get_processor() -> DataProcessor:
     global processor
     if processor is None:
@@ -45,6 +61,28 @@ class TaskStatus(str, Enum):
     FAILED = "FAILED"
 
 
+@dataclass(slots=True)
+class Task:
+    task_id: str
+    status: TaskStatus
+    created_at: str
+    completed_at: Optional[str] = None
+    error: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    mean_velocity_mm_year: Optional[float] = None
+    hazard_level: Optional[str] = None
+    trend_direction: Optional[str] = None
+    acceleration_mm_year2: Optional[float] = None
+    temporal_coherence: Optional[float] = None
+    time_series: Optional[List[Dict]] = None
+
+
+task_store: "TaskStore[str, Task]" = TaskStore(
+    finished=(TaskStatus.COMPLETED, TaskStatus.FAILED)
+)
+
+
 class Coordinate(BaseModel):
     latitude: float = Field(..., example=28.6139)
     longitude: float = Field(..., example=77.2090)
@@ -54,6 +92,10 @@ class StabilityRequest(BaseModel):
     coordinate: Coordinate
 
 
+class StabilityBatchRequest(BaseModel):
+    coordinates: List[Coordinate] = Field(..., min_length=1, max_length=1000)
+
+
 class TaskResponse(BaseModel):
     task_id: str
     status: TaskStatus
@@ -61,6 +103,10 @@ class TaskResponse(BaseModel):
     estimated_time: Optional[str] = None
 
 
+class BatchTaskResponse(BaseModel):
+    tasks: List[TaskResponse]
+
+
 class TimeSeriesPoint(BaseModel):
     date: str
     displacement_mm: float
@@ -82,47 +128,83 @@ class StabilityResult(BaseModel):
     error: Optional[str] = None
 
 
-def process_stability_task(task_id: str, latitude: float, longitude: float):
+def record_point_analysis(task: Task, point: Dict):
+    ts: pd.DataFrame = get_processor().extract_time_series(point)
+
+    analysis = calculator.analyze_point(ts, point)
+
+    history = calculator.format_time_series(ts)
+
+    task.mean_velocity_mm_year = analysis["mean_velocity_mm_year"]
+    task.hazard_level = analysis["hazard_level"]
+    task.trend_direction = analysis["trend_direction"]
+    task.acceleration_mm_year2 = analysis["acceleration_mm_year2"]
+    task.temporal_coherence = analysis.get("temporal_coherence")
+    task.time_series = history
+
+
+def analyze_location(task: Task, easting: float, northing: float):
+    point = get_processor().find_nearest_point(easting, northing, radius_m=100)
+    if not point:
+        raise ValueError("No EGMS point found nearby")
+
+    record_point_analysis(task, point)
+
+
+async def process_stability_task(task_id: str, latitude: float, longitude: float):
+    task = task_store[task_id]
     try:
-        task_store[task_id]["status"] = TaskStatus.PROCESSING
+        task.status = TaskStatus.PROCESSING
 
-        proc = get_processor()
-        easting, northing = to_egms.transform(longitude, latitude)
-        point = proc.find_nearest_point(easting, northing, radius_m=100)
-        if not point:
-            raise ValueError("No EGMS point found nearby")
+        easting, northing = await coordinate_batcher.process_batched((longitude, latitude))
+        await run_in_threadpool(analyze_location, task, easting, northing)
 
-        ts: pd.DataFrame = proc.extract_time_series(point)
+        task.latitude = latitude
+        task.longitude = longitude
+        task.completed_at = datetime.utcnow().isoformat()
+        task.status = TaskStatus.COMPLETED
 
-        analysis = calculator.analyze_point(ts, point)
+    except Exception as e:
+        task.error = str(e)
+        task.completed_at = datetime.utcnow().isoformat()
+        task.status = TaskStatus.FAILED
 
-        history = [
-            {
-                "date": row["date"].strftime("%Y-%m-%d"),
-                "displacement_mm": round(float(row["displacement"]), 2),
-            }
-            for _, row in ts.iterrows()
-        ]
 
-        task_store[task_id].update({
-            "status": TaskStatus.COMPLETED,
-            "latitude": latitude,
-            "longitude": longitude,
-            "mean_velocity_mm_year": analysis["mean_velocity_mm_year"],
-            "hazard_level": analysis["hazard_level"],
-            "trend_direction": analysis["trend_direction"],
-            "acceleration_mm_year2": analysis["acceleration_mm_year2"],
-            "temporal_coherence": analysis.get("temporal_coherence"),
-            "time_series": history,
-            "completed_at": datetime.utcnow().isoformat(),
-        })
+def process_stability_batch(task_ids: List[str], coordinates: List[Coordinate]):
+    tasks = [task_store[task_id] for task_id in task_ids]
+    for task in tasks:
+        task.status = TaskStatus.PROCESSING
+
+    try:
+        lons = np.array([c.longitude for c in coordinates], dtype=np.float64)
+        lats = np.array([c.latitude for c in coordinates], dtype=np.float64)
+        eastings, northings = to_egms.transform(lons, lats)
 
+        # one KD-tree query and one Arrow take per file for the whole batch
+        points = get_processor().find_nearest_points(eastings, northings, radius_m=100)
     except Exception as e:
-        task_store[task_id].update({
-            "status": TaskStatus.FAILED,
-            "error": str(e),
-            "completed_at": datetime.utcnow().isoformat(),
-        })
+        for task in tasks:
+            task.error = str(e)
+            task.completed_at = datetime.utcnow().isoformat()
+            task.status = TaskStatus.FAILED
+        return
+
+    for task, coord, point in zip(tasks, coordinates, points):
+        try:
+            if not point:
+                raise ValueError("No EGMS point found nearby")
+
+            record_point_analysis(task, point)
+
+            task.latitude = coord.latitude
+            task.longitude = coord.longitude
+            task.completed_at = datetime.utcnow().isoformat()
+            task.status = TaskStatus.COMPLETED
+
+        except Exception as e:
+            task.error = str(e)
+            task.completed_at = datetime.utcnow().isoformat()
+            task.status = TaskStatus.FAILED
 
 
 @router.post("/predict/start", response_model=TaskResponse)
@@ -132,13 +214,11 @@ async def start_stability_analysis(
 ):
     task_id = f"stab_{uuid.uuid4().hex[:8]}"
 
-    task_store[task_id] = {
-        "task_id": task_id,
-        "status": TaskStatus.QUEUED,
-        "created_at": datetime.utcnow().isoformat(),
-        "completed_at": None,
-        "error": None,
-    }
+    task_store.add(Task(
+        task_id=task_id,
+        status=TaskStatus.QUEUED,
+        created_at=datetime.utcnow().isoformat(),
+    ))
 
     background_tasks.add_task(
         process_stability_task,
@@ -155,6 +235,39 @@ async def start_stability_analysis(
     )
 
 
+@router.post("/predict/batch", response_model=BatchTaskResponse)
+async def start_stability_batch(
+    request: StabilityBatchRequest,
+    background_tasks: BackgroundTasks,
+):
+    created_at = datetime.utcnow().isoformat()
+    task_ids = [f"stab_{uuid.uuid4().hex[:8]}" for _ in request.coordinates]
+
+    for task_id in task_ids:
+        task_store.add(Task(
+            task_id=task_id,
+            status=TaskStatus.QUEUED,
+            created_at=created_at,
+        ))
+
+    background_tasks.add_task(
+        process_stability_batch,
+        task_ids,
+        request.coordinates,
+    )
+
+    return BatchTaskResponse(
+        tasks=[
+            TaskResponse(
+                task_id=task_id,
+                status=TaskStatus.QUEUED,
+                message="Stability analysis started",
+            )
+            for task_id in task_ids
+        ]
+    )
+
+
 @router.get("/predict/results/{task_id}", response_model=StabilityResult)
 async def get_stability_results(task_id: str):
     task = task_store.get(task_id)
@@ -164,7 +277,7 @@ async def get_stability_results(task_id: str):
             detail="Task not found",
         )
 
-    return StabilityResult(**task)
+    return StabilityResult.model_validate(task, from_attributes=True)
 
 
 @router.get("/predict/tasks")
@@ -174,8 +287,8 @@ async def list_tasks():
         "tasks": [
             {
                 "task_id": k,
-                "status": v["status"],
-                "created_at": v["created_at"],
+                "status": v.status,
+                "created_at": v.created_at,
             }
             for k, v in task_store.items()
         ],
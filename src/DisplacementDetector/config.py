@@ -1,14 +1,23 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 
 EGMS_DATA_DIR = BASE_DIR / "data" / "raw" / "egms"
+EGMS_INDEX_DIR = BASE_DIR / "data" / "processed" / "egms_index"
 
 MODELS_DIR = BASE_DIR / "models"
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
+# native XGBoost binary (UBJSON); the pickle is only read as a fallback
+MODEL_PATH = MODELS_DIR / "egms_xgb.ubj"
+LEGACY_MODEL_PATH = MODELS_DIR / "egms_xgb.pkl"
+
 MIN_COHERENCE = 0.6
 
+# "cuda" to train on GPU; inference stays on CPU (faster for single samples)
+XGB_DEVICE = os.getenv("XGB_DEVICE", "cpu")
+
 XGBOOST_PARAMS = {
     "n_estimators": 300,
     "max_depth": 6,
@@ -18,4 +27,6 @@ XGBOOST_PARAMS = {
     "objective": "reg:squarederror",
     "n_jobs": -1,
     "random_state": 42,
+    "tree_method": "hist",
+    "device": XGB_DEVICE,
 }
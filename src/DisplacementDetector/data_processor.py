@@ -1,83 +1,175 @@
+import re
+import json
+import pickle
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pa_csv, feather
 from pathlib import Path
-from typing import Dict, Optional
-from scipy.spatial import KDTree
-from sklearn.linear_model import LinearRegression
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from scipy.spatial import cKDTree as KDTree
 
 from src.DisplacementDetector import config
+from src.DisplacementDetector.velocityCalculator import mean_velocity, series_arrays
+
+DATE_COL_RE = re.compile(r"^\d{8}$")
 
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self) -> None:
         self.egms_dir: Path = config.EGMS_DATA_DIR
+        self.index_dir: Path = config.EGMS_INDEX_DIR
         self.kdtree: Optional[KDTree] = None
-        self.coord_index = []   # [(file, row_idx)]
-        self.coords = []
+        self.file_table: List[Path] = []
+        self.tables: Dict[Path, pa.Table] = {}
+        self._date_cols_cache: Dict[tuple, Tuple[List[str], np.ndarray]] = {}
+        self.file_idx: Optional[np.ndarray] = None   # point -> index into file_table
+        self.row_idx: Optional[np.ndarray] = None    # point -> row in that csv
 
         if not self.egms_dir.exists():
             raise FileNotFoundError(f"EGMS directory not found: {self.egms_dir}")
 
-    def load_egms_data(self):
-        print("Building spatial index (streaming CSVs)...")
-
-        for csv_file in self.egms_dir.glob("*.csv"):
+    def _ensure_feather(self, csv_file: Path) -> Path:
+        feather_file = csv_file.with_suffix(".feather")
+
+        if (
+            not feather_file.exists()
+            or feather_file.stat().st_mtime < csv_file.stat().st_mtime
+        ):
+            print(f"Converting {csv_file.name} -> {feather_file.name}")
+            table = pa_csv.read_csv(
+                csv_file, read_options=pa_csv.ReadOptions(use_threads=True)
+            )
+            feather.write_feather(table, feather_file, compression="uncompressed")
+
+        return feather_file
+
+    def _index_is_fresh(self) -> bool:
+        manifest = self.index_dir / "files.json"
+        if not manifest.exists():
+            return False
+
+        if json.loads(manifest.read_text()) != [f.name for f in self.file_table]:
+            return False
+
+        built = manifest.stat().st_mtime
+        return all(f.stat().st_mtime < built for f in self.file_table)
+
+    def _load_index(self) -> None:
+        self.file_idx = np.load(self.index_dir / "file_idx.npy", mmap_mode="r")
+        self.row_idx = np.load(self.index_dir / "row_idx.npy", mmap_mode="r")
+        with open(self.index_dir / "kdtree.pkl", "rb") as f:
+            self.kdtree = pickle.load(f)
+
+    def _save_index(self) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(self.index_dir / "file_idx.npy", self.file_idx)
+        np.save(self.index_dir / "row_idx.npy", self.row_idx)
+        with open(self.index_dir / "kdtree.pkl", "wb") as f:
+            pickle.dump(self.kdtree, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # written last: its mtime marks the index as complete
+        (self.index_dir / "files.json").write_text(
+            json.dumps([f.name for f in self.file_table])
+        )
+
+    def load_egms_data(self) -> None:
+        print("Building spatial index (memory-mapped Feather tables)...")
+
+        self.file_table = sorted(self.egms_dir.glob("*.csv"))
+        if not self.file_table:
+            raise FileNotFoundError(f"No EGMS CSV files found in {self.egms_dir}")
+
+        for csv_file in self.file_table:
+            table = feather.read_table(self._ensure_feather(csv_file), memory_map=True)
+            self.tables[csv_file] = table
+
+        if self._index_is_fresh():
+            self._load_index()
+            print(f"Loaded cached index of {self.kdtree.n} EGMS points")
+            return
+
+        coords, file_ids, rows = [], [], []
+
+        for file_id, csv_file in enumerate(self.file_table):
             print(f"Indexing {csv_file.name}")
 
-            for chunk in pd.read_csv(csv_file, chunksize=200_000):
-                for idx, row in chunk.iterrows():
-                    self.coords.append((row["easting"], row["northing"]))
-                    self.coord_index.append((csv_file, idx))
+            table = self.tables[csv_file]
+            n = table.num_rows
+            coords.append(np.column_stack((
+                table.column("easting").to_numpy().astype(np.float32),
+                table.column("northing").to_numpy().astype(np.float32),
+            )))
+            file_ids.append(np.full(n, file_id, dtype=np.int16))
+            rows.append(np.arange(n, dtype=np.int32))
+
+        xy = np.concatenate(coords)
+        self.file_idx = np.concatenate(file_ids)
+        self.row_idx = np.concatenate(rows)
+
+        self.kdtree = KDTree(xy, balanced_tree=False, compact_nodes=False)
+        self._save_index()
+        print(f"Indexed {len(xy)} EGMS points")
+
+    def _query(
+        self, eastings: Sequence[float], northings: Sequence[float]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if self.kdtree is None:
+            self.load_egms_data()
 
-        self.kdtree = KDTree(np.array(self.coords))
-        print(f"Indexed {len(self.coords)} EGMS points")
+        xy = np.column_stack((np.atleast_1d(eastings), np.atleast_1d(northings)))
+        return self.kdtree.query(xy, k=1, workers=-1)
 
     def find_nearest_point(
         self, easting: float, northing: float, radius_m: float = 100
     ) -> Optional[Dict]:
-
-        if self.kdtree is None:
-            self.load_egms_data()
-
-        dist, idx = self.kdtree.query([(easting, northing)], k=1)
-
-        if dist[0] > radius_m:
-            return None
-
-        csv_file, row_idx = self.coord_index[idx[0]]
-
-        df = pd.read_csv(csv_file)
-        return df.iloc[row_idx].to_dict()
+        return self.find_nearest_points([easting], [northing], radius_m)[0]
+
+    def find_nearest_points(
+        self, eastings: Sequence[float], northings: Sequence[float], radius_m: float = 100
+    ) -> List[Optional[Dict]]:
+        dist, idx = self._query(eastings, northings)
+
+        points: List[Optional[Dict]] = [None] * len(idx)
+        hits = np.flatnonzero(dist <= radius_m)
+        hit_files = self.file_idx[idx[hits]]
+
+        # one Arrow take per file touched, not per point
+        for file_id in np.unique(hit_files):
+            table = self.tables[self.file_table[file_id]]
+            sel = hits[hit_files == file_id]
+            rows = table.take(pa.array(self.row_idx[idx[sel]])).to_pylist()
+            for i, row in zip(sel, rows):
+                points[i] = row
+
+        return points
+
+    def _date_columns(self, columns: Iterable[str]) -> Tuple[List[str], np.ndarray]:
+        key = tuple(columns)
+        cached = self._date_cols_cache.get(key)
+        if cached is None:
+            # YYYYMMDD names sort chronologically as strings
+            names = sorted(c for c in key if DATE_COL_RE.match(c))
+            dates = pd.to_datetime(names, format="%Y%m%d").to_numpy()
+            cached = self._date_cols_cache[key] = (names, dates)
+        return cached
+
+    @staticmethod
+    def _to_series(dates: np.ndarray, vals: np.ndarray) -> pd.DataFrame:
+        mask = ~np.isnan(vals)
+        return pd.DataFrame({"date": dates[mask], "displacement": vals[mask]})
 
     def extract_time_series(self, point: Dict) -> pd.DataFrame:
-        ts = []
-
-        for col, val in point.items():
-            if col.isdigit() and len(col) == 8 and pd.notna(val):
-                ts.append({
-                    "date": pd.to_datetime(col, format="%Y%m%d"),
-                    "displacement": float(val),
-                })
-
-        return pd.DataFrame(ts).sort_values("date")
+        names, dates = self._date_columns(point.keys())
+        vals = np.array([point[c] for c in names], dtype=np.float32)
+        return self._to_series(dates, vals)
 
     def compute_velocity(self, ts: pd.DataFrame) -> Dict:
         if len(ts) < 5:
             return {"mean_velocity_mm_year": 0.0}
 
-        ts = ts.copy()
-        ts["days"] = (ts["date"] - ts["date"].min()).dt.days
-
-        X = ts[["days"]].values
-        y = ts["displacement"].values
-
-        model = LinearRegression()
-        model.fit(X, y)
-
-        vel_mm_day = model.coef_[0]
-        vel_mm_year = vel_mm_day * 365.25
-
-        return {"mean_velocity_mm_year": round(vel_mm_year, 2)}
+        days, disp, _ = series_arrays(ts)
+        return {"mean_velocity_mm_year": round(mean_velocity(days, disp), 2)}
 
 
 if __name__ == "__main__":
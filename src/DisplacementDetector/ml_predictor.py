@@ -4,6 +4,8 @@ import pickle
 import xgboost as xgb
 import json  
 from pathlib import Path
+from typing import Tuple
+from pyarrow import feather
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
 
@@ -32,43 +34,85 @@ class DisplacementPredictor:
 
         return df.dropna()
 
+    # create_features for a whole (n_points, n_dates) slab at once: returns
+    # features (n_points, n_dates - 3, 8) in the same column order, targets
+    # (n_points, n_dates - 3) and a mask of rows with no missing inputs
+    @staticmethod
+    def create_feature_matrix(
+        D: np.ndarray, dates: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # left-pack each point's valid acquisitions (stable, so still in date
+        # order) so lags skip gaps and days count from the point's first
+        # acquisition, exactly as create_features sees the NaN-dropped series
+        order = np.argsort(np.isnan(D), axis=1, kind="stable")
+        P = np.take_along_axis(D, order, axis=1)
+        T = dates[order]
+
+        d = pd.DatetimeIndex(T[:, 3:].ravel())
+
+        days = (T[:, 3:] - T[:, :1]).astype("timedelta64[D]").astype(np.float32)
+        month = d.month.to_numpy(np.float32).reshape(days.shape)
+        doy = d.dayofyear.to_numpy(np.float32).reshape(days.shape)
+
+        cur = P[:, 3:]
+        lag1 = P[:, 2:-1]
+        lag2 = P[:, 1:-2]
+        lag3 = P[:, :-3]
+
+        feats = np.stack([
+            days,
+            month,
+            doy,
+            lag1,
+            lag2,
+            lag3,
+            (lag2 + lag1 + cur) / 3,
+            cur - lag1,
+        ], axis=-1)
+
+        # the padding after a row's last acquisition is NaN
+        valid = ~np.isnan(feats).any(axis=-1)
+        return feats, cur, valid
+
     def train(self, max_points: int = 5000):
         X_all, y_all = [], []
 
         count = 0
-        for csv_file in config.EGMS_DATA_DIR.glob("*.csv"):
-            df = pd.read_csv(csv_file)
+        for csv_file in sorted(config.EGMS_DATA_DIR.glob("*.csv")):
+            table = feather.read_table(
+                self.processor._ensure_feather(csv_file), memory_map=True
+            )
+            names, dates = self.processor._date_columns(table.column_names)
 
-            for _, row in df.iterrows():
-                if row["temporal_coherence"] < config.MIN_COHERENCE:
-                    continue
+            coherent = table.column("temporal_coherence").to_numpy() >= config.MIN_COHERENCE
+            D = table.select(names).to_pandas().to_numpy(dtype=np.float32)[coherent]
 
-                ts = self.processor.extract_time_series(row.to_dict())
-                if len(ts) < 20:
-                    continue
+            D = D[(~np.isnan(D)).sum(axis=1) >= 20]
+            feats, target, valid = self.create_feature_matrix(D, dates)
 
-                feats = self.create_features(ts)
-                if len(feats) < 5:
-                    continue
+            keep = valid.sum(axis=1) >= 5
+            feats, target, valid = feats[keep], target[keep], valid[keep]
 
-                X_all.append(feats.drop(columns=["date", "displacement"]).values)
-                y_all.append(feats["displacement"].values)
+            take = min(len(feats), max_points - count)
+            X_all.append(feats[:take][valid[:take]])
+            y_all.append(target[:take][valid[:take]])
 
-                count += 1
-                if count >= max_points:
-                    break
+            count += take
             if count >= max_points:
                 break
 
-        X = np.vstack(X_all)
+        X = np.vstack(X_all).astype(np.float32)
         y = np.concatenate(y_all)
 
         Xtr, Xte, ytr, yte = train_test_split(X, y, test_size=0.2, random_state=42)
 
-        self.model = xgb.XGBRegressor(**config.XGBOOST_PARAMS)
-        self.model.fit(Xtr, ytr)
+        params = dict(config.XGBOOST_PARAMS)
+        num_boost_round = params.pop("n_estimators")
+
+        dtrain = xgb.QuantileDMatrix(Xtr, ytr)
+        self.model = xgb.train(params, dtrain, num_boost_round=num_boost_round)
 
-        preds = self.model.predict(Xte)
+        preds = self.model.inplace_predict(Xte)
         
         mae_score = mean_absolute_error(yte, preds)
         r2_score_val = r2_score(yte, preds)
@@ -89,16 +133,20 @@ class DisplacementPredictor:
         print(f"Metrics saved → {result_path}")
         # ---------------------------------
 
-        model_path = config.MODELS_DIR / "egms_xgb.pkl"
-        with open(model_path, "wb") as f:
-            pickle.dump(self.model, f)
+        self.model.save_model(config.MODEL_PATH)
 
-        print(f"Model saved → {model_path}")
+        print(f"Model saved → {config.MODEL_PATH}")
 
     def load_model(self):
-        model_path = config.MODELS_DIR / "egms_xgb.pkl"
-        with open(model_path, "rb") as f:
-            self.model = pickle.load(f)
+        if config.MODEL_PATH.exists():
+            self.model = xgb.Booster()
+            self.model.load_model(config.MODEL_PATH)
+        else:
+            with open(config.LEGACY_MODEL_PATH, "rb") as f:
+                self.model = pickle.load(f)
+
+        booster = self.model if isinstance(self.model, xgb.Booster) else self.model.get_booster()
+        booster.set_param({"device": "cpu"})
 
 
 if __name__ == "__main__":
@@ -1,7 +1,114 @@
 import pandas as pd
 import numpy as np
-from typing import Dict
-from sklearn.linear_model import LinearRegression
+from typing import Dict, List, Tuple, Union
+from numba import njit
+
+
+def elapsed_days(dates: pd.Series) -> np.ndarray:
+    d = dates.to_numpy()
+    return (d - d.min()).astype("timedelta64[D]").astype(np.float64)
+
+
+def linear_slope(x: np.ndarray, y: np.ndarray) -> float:
+    # closed-form OLS slope: cov(x, y) / var(x)
+    xc = x - x.mean()
+    denom = (xc * xc).sum()
+    if denom == 0:
+        return 0.0
+    return float((xc * (y - y.mean())).sum() / denom)
+
+
+def series_arrays(time_series: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (days since first acquisition, displacement, calendar month)
+    return (
+        elapsed_days(time_series["date"]),
+        time_series["displacement"].to_numpy(np.float64),
+        time_series["date"].dt.month.to_numpy(np.int64),
+    )
+
+
+def mean_velocity(days: np.ndarray, disp: np.ndarray) -> float:
+    return linear_slope(days, disp) * 365.25
+
+
+def acceleration(days: np.ndarray, disp: np.ndarray) -> float:
+    coeffs = np.polyfit(days, disp, 2)
+    return float(2 * coeffs[0] * (365.25 ** 2))
+
+
+def seasonality(months: np.ndarray, disp: np.ndarray) -> float:
+    counts = np.bincount(months, minlength=13)
+    present = counts > 0
+    monthly_mean = np.bincount(months, weights=disp, minlength=13)[present] / counts[present]
+    return float(monthly_mean.max() - monthly_mean.min())
+
+
+@njit(cache=True, fastmath=True)
+def _det3(a, b, c, d, e, f, g, h, i):
+    return a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+
+
+# Single fused pass over a displacement series, returning
+# (velocity mm/year, acceleration mm/year^2, seasonal amplitude mm).
+# Time is centred and expressed in years so the quadratic normal
+# equations stay well conditioned.
+@njit(cache=True, fastmath=True)
+def _analyze(days, disp, months):
+    n = days.shape[0]
+
+    mean_day = 0.0
+    for i in range(n):
+        mean_day += days[i]
+    mean_day /= n
+
+    s1 = s2 = s3 = s4 = 0.0
+    sy = sty = st2y = 0.0
+    month_sum = np.zeros(12)
+    month_cnt = np.zeros(12)
+
+    for i in range(n):
+        t = (days[i] - mean_day) / 365.25
+        t2 = t * t
+        y = disp[i]
+
+        s1 += t
+        s2 += t2
+        s3 += t2 * t
+        s4 += t2 * t2
+        sy += y
+        sty += t * y
+        st2y += t2 * y
+
+        m = months[i] - 1
+        month_sum[m] += y
+        month_cnt[m] += 1.0
+
+    # linear fit
+    var_t = s2 - s1 * s1 / n
+    velocity = (sty - s1 * sy / n) / var_t if var_t > 0 else 0.0
+
+    # quadratic fit, Cramer's rule for the leading coefficient
+    det = _det3(n, s1, s2, s1, s2, s3, s2, s3, s4)
+    det_c2 = _det3(n, s1, sy, s1, s2, sty, s2, s3, st2y)
+    acceleration = 2.0 * det_c2 / det if det != 0 else 0.0
+
+    lo = hi = 0.0
+    seen = False
+    for m in range(12):
+        if month_cnt[m] > 0:
+            mean = month_sum[m] / month_cnt[m]
+            if not seen:
+                lo = hi = mean
+                seen = True
+            lo = min(lo, mean)
+            hi = max(hi, mean)
+    seasonality = hi - lo
+
+    return velocity, acceleration, seasonality
+
+
+# compile (or load from cache) at import, not on the first request
+_analyze(np.arange(3.0), np.zeros(3), np.ones(3, dtype=np.int64))
 
 
 class VelocityCalculator:
@@ -16,48 +123,24 @@ class VelocityCalculator:
         if len(time_series) < 5:
             return 0.0
 
-        ts = time_series.copy()
-        ts["days"] = (ts["date"] - ts["date"].min()).dt.days
-
-        X = ts[["days"]].values
-        y = ts["displacement"].values
-
-        model = LinearRegression()
-        model.fit(X, y)
-
-        velocity_mm_day = model.coef_[0]
-        velocity_mm_year = velocity_mm_day * 365.25
-
-        return round(float(velocity_mm_year), 2)
+        days, disp, _ = series_arrays(time_series)
+        return round(mean_velocity(days, disp), 2)
 
     @staticmethod
     def calculate_acceleration(time_series: pd.DataFrame) -> float:
         if len(time_series) < 10:
             return 0.0
 
-        ts = time_series.copy()
-        ts["days"] = (ts["date"] - ts["date"].min()).dt.days
-
-        days = ts["days"].values
-        disp = ts["displacement"].values
-        coeffs = np.polyfit(days, disp, 2)
-        accel_mm_day2 = 2 * coeffs[0]
-        accel_mm_year2 = accel_mm_day2 * (365.25 ** 2)
-
-        return round(float(accel_mm_year2), 2)
+        days, disp, _ = series_arrays(time_series)
+        return round(acceleration(days, disp), 2)
 
     @staticmethod
     def calculate_seasonality(time_series: pd.DataFrame) -> float:
         if len(time_series) < 12:
             return 0.0
 
-        ts = time_series.copy()
-        ts["month"] = ts["date"].dt.month
-
-        monthly_mean = ts.groupby("month")["displacement"].mean()
-        seasonality = monthly_mean.max() - monthly_mean.min()
-
-        return round(float(seasonality), 2)
+        _, disp, months = series_arrays(time_series)
+        return round(seasonality(months, disp), 2)
 
     @classmethod
     def determine_hazard_level(cls, velocity: float) -> str:
@@ -83,20 +166,28 @@ class VelocityCalculator:
 
     @classmethod
     def analyze_point(cls, time_series: pd.DataFrame, point_data: Dict | None = None) -> Dict:
-        mean_velocity = cls.calculate_mean_velocity(time_series)
-        acceleration = cls.calculate_acceleration(time_series)
-        seasonality = cls.calculate_seasonality(time_series)
+        n = len(time_series)
+        velocity = accel = season = 0.0
+        span_days = 0
+
+        if n:
+            days, disp, months = series_arrays(time_series)
+            span_days = int(days.max())
+            if n >= 5:
+                velocity, accel, season = _analyze(days, disp, months)
+
+        mean_velocity = round(float(velocity), 2)
+        accel = round(float(accel), 2) if n >= 10 else 0.0
+        season = round(float(season), 2) if n >= 12 else 0.0
 
         analysis = {
             "mean_velocity_mm_year": mean_velocity,
-            "acceleration_mm_year2": acceleration,
-            "seasonality_mm": seasonality,
+            "acceleration_mm_year2": accel,
+            "seasonality_mm": season,
             "hazard_level": cls.determine_hazard_level(mean_velocity),
             "trend_direction": cls.get_trend_direction(mean_velocity),
-            "measurement_count": len(time_series),
-            "time_span_days": (
-                time_series["date"].max() - time_series["date"].min()
-            ).days,
+            "measurement_count": n,
+            "time_span_days": span_days,
         }
 
         if point_data:
@@ -110,13 +201,12 @@ class VelocityCalculator:
         return analysis
 
     @staticmethod
-    def format_time_series(time_series: pd.DataFrame) -> list:
+    def format_time_series(time_series: pd.DataFrame) -> List[Dict[str, Union[str, float]]]:
+        dates = time_series["date"].dt.strftime("%Y-%m-%d").tolist()
+        disps = np.round(time_series["displacement"].to_numpy(np.float64), 2).tolist()
         return [
-            {
-                "date": row["date"].strftime("%Y-%m-%d"),
-                "displacement_mm": round(float(row["displacement"]), 2),
-            }
-            for _, row in time_series.iterrows()
+            {"date": d, "displacement_mm": v}
+            for d, v in zip(dates, disps)
         ]
 
 
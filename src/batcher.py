@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any, Callable, List, Optional, Sequence
+
+from src.logging import logging
+
+
+class DynamicBatcher:
+    """
+    Coalesce concurrent single-item calls into one batched call.
+
+    Items submitted within `max_delay` seconds of the first queued item (up to
+    `max_batch_size`) are handed to `infer` together. `infer` runs in a worker
+    thread so the event loop keeps serving requests, and must return one
+    result per input item, in order.
+    """
+
+    def __init__(
+        self,
+        infer: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 64,
+        max_delay: float = 0.005,
+    ):
+        self.infer = infer
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            self._queue = None
+
+    async def process_batched(self, item: Any) -> Any:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_delay
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _dispatch(self, batch: list):
+        items = [item for item, _ in batch]
+        results = await asyncio.to_thread(self.infer, items)
+
+        # zip would silently leave the tail of the batch waiting forever
+        if len(results) != len(batch):
+            raise RuntimeError(
+                f"infer returned {len(results)} results for {len(batch)} items"
+            )
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+
+            try:
+                await self._dispatch(batch)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                # fail this batch's callers but keep the worker alive
+                logging.error(f"Batched inference failed for {len(batch)} items: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
@@ -1,5 +1,6 @@
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Optional
 
 from src.chemical_analysis.inference.pipeline import InferencePipeline
 from src.chemical_analysis.inference.earth_engine_feature import EarthEngineDataFetcher
@@ -11,9 +12,26 @@ from src.chemical_analysis.api.schemas import (
     FeatureProperties,
     FeatureCollection,
 )
+from src.batcher import DynamicBatcher
+from src.task_store import TaskStore
 from src.logging import logging
 
-task_store: Dict[str, Dict] = {}
+
+@dataclass(slots=True)
+class Task:
+    task_id: str
+    status: TaskStatus
+    aoi_name: str
+    created_at: str
+    data: Optional[FeatureCollection] = None
+    error: Optional[str] = None
+    completed_at: Optional[str] = None
+
+
+task_store: "TaskStore[str, Task]" = TaskStore(
+    finished=(TaskStatus.COMPLETED, TaskStatus.FAILED)
+)
+
 
 _inference_pipeline: Optional[InferencePipeline] = None
 _ee_fetcher: Optional[EarthEngineDataFetcher] = None
@@ -27,6 +45,14 @@ def get_inference_pipeline() -> InferencePipeline:
     return _inference_pipeline
 
 
+# concurrent analysis tasks share one XGBoost call per batch
+predict_batcher = DynamicBatcher(
+    lambda features_list: get_inference_pipeline().predict_many(features_list),
+    max_batch_size=64,
+    max_delay=0.005,
+)
+
+
 def get_ee_fetcher() -> EarthEngineDataFetcher:
     global _ee_fetcher
     if _ee_fetcher is None:
@@ -36,8 +62,9 @@ def get_ee_fetcher() -> EarthEngineDataFetcher:
 
 
 async def process_analysis_task(task_id: str, request: AnalysisRequest):
+    task = task_store[task_id]
     try:
-        task_store[task_id]["status"] = TaskStatus.PROCESSING
+        task.status = TaskStatus.PROCESSING
 
         fetcher = get_ee_fetcher()
 
@@ -68,8 +95,7 @@ async def process_analysis_task(task_id: str, request: AnalysisRequest):
             scale=100,
         )
 
-        pipeline = get_inference_pipeline()
-        preds = pipeline.predict(mean_values)
+        preds = await predict_batcher.process_batched(mean_values)
 
         # Recommendation logic
         recs = []
@@ -98,20 +124,12 @@ async def process_analysis_task(task_id: str, request: AnalysisRequest):
             ),
         )
 
-        task_store[task_id].update(
-            {
-                "status": TaskStatus.COMPLETED,
-                "data": FeatureCollection(features=[feature]),
-                "completed_at": datetime.utcnow().isoformat(),
-            }
-        )
+        task.data = FeatureCollection(features=[feature])
+        task.completed_at = datetime.utcnow().isoformat()
+        task.status = TaskStatus.COMPLETED
 
     except Exception as e:
         logging.error(f"Task {task_id} failed: {e}")
-        task_store[task_id].update(
-            {
-                "status": TaskStatus.FAILED,
-                "error": str(e),
-                "completed_at": datetime.utcnow().isoformat(),
-            }
-        )
+        task.error = str(e)
+        task.completed_at = datetime.utcnow().isoformat()
+        task.status = TaskStatus.FAILED
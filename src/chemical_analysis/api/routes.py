@@ -9,6 +9,7 @@ from src.chemical_analysis.api.schemas import (
     AnalysisResult,
 )
 from src.chemical_analysis.api.functions import (
+    Task,
     task_store,
     process_analysis_task,
 )
@@ -21,15 +22,12 @@ router = APIRouter(tags=["Chemical Analysis"])
 async def start_analysis(request: AnalysisRequest, background_tasks: BackgroundTasks ):
     task_id = f"agri_{uuid.uuid4().hex[:8]}"
 
-    task_store[task_id] = {
-        "task_id": task_id,
-        "status": TaskStatus.QUEUED,
-        "aoi_name": request.aoi_name,
-        "created_at": datetime.utcnow().isoformat(),
-        "data": None,
-        "error": None,
-        "completed_at": None,
-    }
+    task_store.add(Task(
+        task_id=task_id,
+        status=TaskStatus.QUEUED,
+        aoi_name=request.aoi_name,
+        created_at=datetime.utcnow().isoformat(),
+    ))
 
     background_tasks.add_task(process_analysis_task, task_id, request)
 
@@ -51,7 +49,7 @@ async def get_analysis_results(task_id: str):
             detail="Task not found",
         )
 
-    return AnalysisResult(**task)
+    return AnalysisResult.model_validate(task, from_attributes=True)
 
 @router.get("/analysis/agri/tasks")
 async def list_tasks():
@@ -60,9 +58,9 @@ async def list_tasks():
         "tasks": [
             {
                 "task_id": k,
-                "status": v["status"],
-                "aoi_name": v["aoi_name"],
-                "created_at": v["created_at"],
+                "status": v.status,
+                "aoi_name": v.aoi_name,
+                "created_at": v.created_at,
             }
             for k, v in task_store.items()
         ],
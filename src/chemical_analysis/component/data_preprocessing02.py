@@ -1,38 +1,40 @@
 import os
 import sys
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from src.logging import logging
 from src.exception import CustomException
 
+COLUMNS = [
+    'B11', 'B12', 'B2', 'B3', 'B4', 'B8',
+    'Evap_tavg', 'NDVI', 'NDWI',
+    'Rainf_tavg', 'SAVI',
+    'SoilMoi0_10cm_inst', 'Tair_f_inst',
+    'elevation', 'slope',
+    'N', 'K', 'P', 'pH'
+]
+
 
 class DataPreprocessing:
-    def __init__(self, csv_path: str, output_path: str):
-        try:
-            logging.info("Reading CSV file")
-            self.df = pd.read_csv(csv_path)
-            self.output_path = output_path
-        except Exception as e:
-            logging.error("Error reading CSV file")
-            raise CustomException(e, sys)
+    def __init__(self, csv_path: str, output_path: str, chunksize: int = 100_000):
+        self.csv_path = csv_path
+        self.output_path = output_path
+        self.chunksize = chunksize
+        self.df = None
 
     def basic_preprocessing(self):
         try:
             logging.info("Basic Preprocessing .....")
 
-            df = self.df.copy()
-            df = df.dropna()
-            df = df.drop_duplicates()
+            # only the retained columns are parsed, and null rows are dropped
+            # per chunk so peak memory stays near one chunk of raw data
+            reader = pd.read_csv(self.csv_path, usecols=COLUMNS, chunksize=self.chunksize)
+            chunks = [chunk[COLUMNS].dropna() for chunk in reader]
 
-            df = df[
-                [
-                    'B11', 'B12', 'B2', 'B3', 'B4', 'B8',
-                    'Evap_tavg', 'NDVI', 'NDWI',
-                    'Rainf_tavg', 'SAVI',
-                    'SoilMoi0_10cm_inst', 'Tair_f_inst',
-                    'elevation', 'slope',
-                    'N', 'K', 'P', 'pH'
-                ]
-            ]
+            # select -> dropna -> dedupe: the hash only sees retained columns
+            df = pd.concat(chunks, ignore_index=True, copy=False)
+            df = df.drop_duplicates()
 
             self.df = df
             return self.df
@@ -44,16 +46,17 @@ class DataPreprocessing:
         try:
             logging.info("Handling Outliers .......")
 
-            df = self.df.copy()
+            # self.df is already a fresh frame from basic_preprocessing
+            df = self.df
             feature_cols = df.columns.difference(['N', 'K', 'P', 'pH'])
 
-            for col in feature_cols:
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5*IQR
-                upper_bound = Q3 + 1.5*IQR
-                df[col] = df[col].clip(lower=lower_bound, upper=upper_bound)
+            feat = df[feature_cols].to_numpy(dtype=np.float64)
+            Q1, Q3 = np.quantile(feat, [0.25, 0.75], axis=0)
+            IQR = Q3 - Q1
+            lower_bound = Q1 - 1.5*IQR
+            upper_bound = Q3 + 1.5*IQR
+            np.clip(feat, lower_bound, upper_bound, out=feat)
+            df[feature_cols] = feat
             self.df = df
             return self.df
 
@@ -88,11 +91,18 @@ class DataPreprocessing:
             raise CustomException(e, sys)
 
 
-if __name__ == "__main__":
-    preprocessor1 = DataPreprocessing(csv_path= "data/raw/lucas_training_data.csv",
-                                      output_path= "data/processed/lucas_training_data.csv")
-    preprocessor1.run()
+def preprocess(csv_path: str, output_path: str):
+    DataPreprocessing(csv_path=csv_path, output_path=output_path).run()
 
-    preprocessor2 = DataPreprocessing(csv_path= "data/raw/punjab_soil_samples.csv",
-                                      output_path= "data/processed/punjab_soil_samples.csv")
-    preprocessor2.run()
\ No newline at end of file
+
+if __name__ == "__main__":
+    # the two datasets are independent, so preprocess them side by side
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(preprocess, "data/raw/lucas_training_data.csv",
+                            "data/processed/lucas_training_data.csv"),
+            executor.submit(preprocess, "data/raw/punjab_soil_samples.csv",
+                            "data/processed/punjab_soil_samples.csv"),
+        ]
+        for future in futures:
+            future.result()
\ No newline at end of file
@@ -3,12 +3,17 @@ import sys
 import joblib
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import (
-    StandardScaler, PowerTransformer, QuantileTransformer
+    StandardScaler, FunctionTransformer, QuantileTransformer
 )
 from src.logging import logging
 from src.exception import CustomException
+from src.chemical_analysis.component.transforms import (
+    signed_log1p, signed_expm1, arcsine_sqrt
+)
 
 
 class FeatureEngineering:
@@ -17,6 +22,7 @@ class FeatureEngineering:
         self.X_save_path = X_save_path
         self.y_save_path = y_save_path
         self.preprocessor = None
+        self.medians = None
         self.target_cols = ["N", "P", "K", "pH"]
         self.normal_cols = [ "B11", "B12", "B8", "Evap_tavg", "SoilMoi0_10cm_inst", "Tair_f_inst" ]
         self.log_skewed_cols = [ "B2", "B3", "B4", "elevation", "slope" ]
@@ -29,14 +35,22 @@ class FeatureEngineering:
             self.preprocessor = ColumnTransformer(
                 transformers=[
                     ("normal", StandardScaler(), self.normal_cols),
-                    ("skewed", PowerTransformer(method="yeo-johnson"), self.log_skewed_cols),
-                    ("bounded", PowerTransformer(method="yeo-johnson"), self.bounded_cols),
+                    ("skewed", make_pipeline(
+                        FunctionTransformer(signed_log1p, inverse_func=signed_expm1),
+                        StandardScaler()
+                    ), self.log_skewed_cols),
+                    ("bounded", make_pipeline(
+                        FunctionTransformer(arcsine_sqrt),
+                        StandardScaler()
+                    ), self.bounded_cols),
                     ("rain", QuantileTransformer(
                         n_quantiles=100,
+                        subsample=10_000,
                         output_distribution="normal"
                     ), self.rain_cols),
                 ],
-                remainder="drop"
+                remainder="drop",
+                n_jobs=-1
             )
             return self.preprocessor
         except Exception as e:
@@ -60,12 +74,20 @@ class FeatureEngineering:
             if self.preprocessor is None:
                 self.build_preprocessor()
 
-            X_transformed = self.preprocessor.fit_transform(X_df)
+            # more quantiles than samples only makes sklearn warn and re-sort
+            self.preprocessor.set_params(rain__n_quantiles=min(100, len(X_df)))
+
+            # float32 is all XGBoost trains on; halves the saved/mapped bytes
+            X_transformed = self.preprocessor.fit_transform(X_df).astype(np.float32, copy=False)
+            y = y_df.to_numpy(dtype=np.float32)
+
+            # training-distribution medians, used to impute missing inputs at inference
+            self.medians = X_df.median()
 
-            self._save_outputs(X_transformed, y_df)
+            self._save_outputs(X_transformed, y)
             self._save_preprocessor()
 
-            return X_transformed, y_df.values
+            return X_transformed, y
 
         except Exception as e:
             raise CustomException(e, sys)
@@ -80,11 +102,12 @@ class FeatureEngineering:
             if self.preprocessor is None:
                 self.preprocessor = joblib.load(self.preprocessor_path)
 
-            X_transformed = self.preprocessor.transform(X_df)
+            X_transformed = self.preprocessor.transform(X_df).astype(np.float32, copy=False)
+            y = y_df.to_numpy(dtype=np.float32)
 
-            self._save_outputs(X_transformed, y_df)
+            self._save_outputs(X_transformed, y)
 
-            return X_transformed, y_df.values
+            return X_transformed, y
 
         except Exception as e:
             raise CustomException(e, sys)
@@ -93,25 +116,34 @@ class FeatureEngineering:
         try:
             logging.info("Saving feature engineering preprocessor")
             os.makedirs(os.path.dirname(self.preprocessor_path), exist_ok=True)
-            joblib.dump(self.preprocessor, self.preprocessor_path)
+            joblib.dump(self.preprocessor, self.preprocessor_path, compress=("zlib", 3), protocol=5)
+
+            medians_path = os.path.join(os.path.dirname(self.preprocessor_path), "feature_medians.joblib")
+            joblib.dump(self.medians, medians_path)
         except Exception as e:
             raise CustomException(e, sys)
 
-    def _save_outputs(self, X: np.ndarray, y: pd.DataFrame):
+    def _save_outputs(self, X: np.ndarray, y: np.ndarray):
         try:
             logging.info("Saving transformed X and raw y")
 
             os.makedirs(os.path.dirname(self.X_save_path), exist_ok=True)
             os.makedirs(os.path.dirname(self.y_save_path), exist_ok=True)
 
-            np.save(self.X_save_path, X)
-            np.save(self.y_save_path, y.values)
+            # plain uncompressed .npy so training can memory-map it
+            np.save(self.X_save_path, X, allow_pickle=False)
+            np.save(self.y_save_path, y, allow_pickle=False)
 
         except Exception as e:
             raise CustomException(e, sys)
 
 if __name__ == "__main__":
     try:
+        # Punjab only needs the fitted preprocessor for its transform, so its
+        # CSV is parsed on a worker thread while LUCAS is fitted and saved
+        io_pool = ThreadPoolExecutor(max_workers=1)
+        punjab_future = io_pool.submit(pd.read_csv, "data/processed/punjab_soil_samples.csv")
+
         logging.info("Running Feature Engineering for LUCAS dataset")
         lucas_df = pd.read_csv("data/processed/lucas_training_data.csv")
 
@@ -131,7 +163,8 @@ if __name__ == "__main__":
 
         logging.info("Running Feature Engineering for Punjab dataset")
 
-        punjab_df = pd.read_csv("data/processed/punjab_soil_samples.csv")
+        punjab_df = punjab_future.result()
+        io_pool.shutdown()
 
         fe_punjab = FeatureEngineering(
             preprocessor_path="artifacts/preprocessor.joblib",
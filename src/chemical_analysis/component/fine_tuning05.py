@@ -1,8 +1,11 @@
 import os
 import sys
+import json
 import yaml
 import joblib
 import numpy as np
+from joblib import Parallel, delayed
+import xgboost as xgb
 from xgboost import XGBRegressor
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 
@@ -14,8 +17,9 @@ class FineTuning:
     def __init__( self, X_path: str, y_path: str, params_path: str, pretrained_models_dir: str, finetuned_models_dir: str, metrics_path: str ):
         try:
             logging.info("Loading Punjab fine-tuning data")
-            self.X = np.load(X_path)
-            self.y = np.load(y_path)
+            # demand-paged; rows are only read in when XGBoost touches them
+            self.X = np.load(X_path, mmap_mode="r")
+            self.y = np.load(y_path, mmap_mode="r")
             self.target_cols = ["N", "P", "K", "pH"]
 
             with open(params_path, "r") as f:
@@ -24,6 +28,10 @@ class FineTuning:
             self.pretrained_models_dir = pretrained_models_dir
             self.finetuned_models_dir = finetuned_models_dir
             self.metrics_path = metrics_path
+            self.device = os.getenv("XGB_DEVICE", "cpu")
+            # the four target models fine-tune concurrently; split cores between them
+            self.n_workers = min(4, os.cpu_count() or 1)
+            self.n_jobs_per_model = max(1, (os.cpu_count() or 1) // self.n_workers)
             os.makedirs(self.finetuned_models_dir, exist_ok=True)
             self.metrics = {}
 
@@ -31,48 +39,81 @@ class FineTuning:
             logging.error("Error initializing FineTuning")
             raise CustomException(e, sys)
 
+    def _finetune_one(self, i: int, target: str):
+        logging.info(f"Fine-tuning model for target: {target}")
+
+        pretrained_path = os.path.join(
+            self.pretrained_models_dir, f"xgb_{target}.joblib"
+        )
+
+        if not os.path.exists(pretrained_path):
+            raise FileNotFoundError(f"Pretrained model not found: {pretrained_path}")
+
+        model: XGBRegressor = joblib.load(pretrained_path)
+        ft_params = self.params.get(f"{target}_FT")
+        if ft_params is None:
+            raise ValueError(f"Missing fine-tuning params for {target}_FT")
+
+        # native Booster parameters; anything not set here (regularisation,
+        # ...) carries over from the pretrained booster's config
+        params = {
+            "objective": model.get_params()["objective"],
+            "max_depth": ft_params["max_depth"],
+            "eta": ft_params["lr"],
+            "tree_method": "hist",
+            "device": self.device,
+            "nthread": self.n_jobs_per_model,
+        }
+
+        y_target = np.ascontiguousarray(self.y[:, i])
+
+        # continue boosting the pretrained booster through the native API
+        # rather than letting the sklearn wrapper serialize it again
+        dtrain = xgb.QuantileDMatrix(self.X, label=y_target)
+        booster = xgb.train(
+            params,
+            dtrain,
+            num_boost_round=ft_params["n_estimators"],
+            xgb_model=model.get_booster()
+        )
+
+        # xgb_model carries the pretrained learner config along; record the
+        # values actually in effect for the fine-tuning rounds
+        train_param = json.loads(booster.save_config())["learner"]["gradient_booster"]["tree_train_param"]
+        logging.info(
+            f"{target}: {booster.num_boosted_rounds()} trees, "
+            f"eta={float(train_param['eta']):g}, max_depth={train_param['max_depth']}"
+        )
+
+        y_pred = booster.inplace_predict(self.X)
+        mse = mean_squared_error(y_target, y_pred)
+        r2 = r2_score(y_target, y_pred)
+        mae = mean_absolute_error(y_target, y_pred)
+
+        metrics = {
+            "mse": mse,
+            "r2": r2,
+            "mae": mae
+        }
+
+        # Save fine-tuned model
+        finetuned_path = os.path.join(
+            self.finetuned_models_dir, f"xgb_{target}_finetuned.ubj"
+        )
+        booster.save_model(finetuned_path)
+        logging.info(f"Saved fine-tuned model: {finetuned_path}")
+
+        return target, metrics
+
     def finetune_and_save(self):
         try:
-            for i, target in enumerate(self.target_cols):
-                logging.info(f"Fine-tuning model for target: {target}")
-
-                pretrained_path = os.path.join(
-                    self.pretrained_models_dir, f"xgb_{target}.joblib"
-                )
-
-                if not os.path.exists(pretrained_path):
-                    raise FileNotFoundError(f"Pretrained model not found: {pretrained_path}")
-
-                model: XGBRegressor = joblib.load(pretrained_path)
-                ft_params = self.params.get(f"{target}_FT")
-                if ft_params is None:
-                    raise ValueError(f"Missing fine-tuning params for {target}_FT")
-
-                model.set_params(
-                    n_estimators=ft_params["n_estimators"],
-                    max_depth=ft_params["max_depth"],
-                    learning_rate=ft_params["lr"]
-                )
-
-                y_target = self.y[:, i]
-                model.fit(self.X, y_target, xgb_model=model.get_booster() )
-                y_pred = model.predict(self.X)
-                mse = mean_squared_error(y_target, y_pred)
-                r2 = r2_score(y_target, y_pred)
-                mae = mean_absolute_error(y_target, y_pred)
-
-                self.metrics[target] = {
-                    "mse": mse,
-                    "r2": r2,
-                    "mae": mae
-                }
-
-                # Save fine-tuned model
-                finetuned_path = os.path.join(
-                    self.finetuned_models_dir, f"xgb_{target}_finetuned.joblib"
-                )
-                joblib.dump(model, finetuned_path)
-                logging.info(f"Saved fine-tuned model: {finetuned_path}")
+            # XGBoost releases the GIL while boosting, so threads fine-tune the
+            # targets in parallel over the same memory-mapped X
+            results = Parallel(n_jobs=self.n_workers, backend="threading")(
+                delayed(self._finetune_one)(i, target)
+                for i, target in enumerate(self.target_cols)
+            )
+            self.metrics = dict(results)
 
             with open(self.metrics_path, "w") as f:
                 for t, m in self.metrics.items():
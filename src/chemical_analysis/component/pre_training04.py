@@ -3,6 +3,7 @@ import sys
 import yaml
 import joblib
 import numpy as np
+from joblib import Parallel, delayed
 import pandas as pd
 from xgboost import XGBRegressor
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
@@ -17,9 +18,13 @@ class PreTraining:
         self.params_path = params_path
         self.models_dir = models_dir
         self.metrics_path = metrics_path
+        self.device = os.getenv("XGB_DEVICE", "cpu")
+        # the four target models train concurrently; split cores between them
+        self.n_workers = min(4, os.cpu_count() or 1)
+        self.n_jobs_per_model = max(1, (os.cpu_count() or 1) // self.n_workers)
         try:
             logging.info("Loading features and targets")
-            self.X = np.load(self.X_path)
+            self.X = np.ascontiguousarray(np.load(self.X_path), dtype=np.float32)
             self.y = np.load(self.y_path)
             self.target_cols = ["N", "P", "K", "pH"]
         except Exception as e:
@@ -37,34 +42,46 @@ class PreTraining:
 
         self.metrics = {}
 
+    def _train_one(self, i: int, target: str):
+        logging.info(f"Training model for target: {target}")
+
+        y_target = self.y[:, i]
+
+        param = self.params.get(target)
+        if param is None:
+            raise ValueError(f"No params found for target {target}")
+
+        model = XGBRegressor(
+            n_estimators=param.get("n_estimators", 100),
+            max_depth=param.get("max_depth", 6),
+            learning_rate=param.get("lr", 0.1),
+            random_state=42,
+            objective="reg:squarederror",
+            tree_method="hist",
+            device=self.device,
+            n_jobs=self.n_jobs_per_model
+        )
+        model.fit(self.X, y_target)
+        y_pred = model.get_booster().inplace_predict(self.X)
+        mse = mean_squared_error(y_target, y_pred)
+        r2 = r2_score(y_target, y_pred)
+        mae = mean_absolute_error(y_target, y_pred)
+
+        model_file = os.path.join(self.models_dir, f"xgb_{target}.joblib")
+        joblib.dump(model, model_file, compress=("zlib", 3), protocol=5)
+        logging.info(f"Saved model for {target} at {model_file}")
+
+        return target, {"mse": mse, "r2": r2, "mae": mae}
+
     def train_and_save(self):
         try:
-            for i, target in enumerate(self.target_cols):
-                logging.info(f"Training model for target: {target}")
-
-                y_target = self.y[:, i]
-
-                param = self.params.get(target)
-                if param is None:
-                    raise ValueError(f"No params found for target {target}")
-
-                model = XGBRegressor(
-                    n_estimators=param.get("n_estimators", 100),
-                    max_depth=param.get("max_depth", 6),
-                    learning_rate=param.get("lr", 0.1),
-                    random_state=42,
-                    objective="reg:squarederror"
-                )
-                model.fit(self.X, y_target)
-                y_pred = model.predict(self.X)
-                mse = mean_squared_error(y_target, y_pred)
-                r2 = r2_score(y_target, y_pred)
-                mae = mean_absolute_error(y_target, y_pred)
-
-                self.metrics[target] = {"mse": mse, "r2": r2, "mae": mae}
-                model_file = os.path.join(self.models_dir, f"xgb_{target}.joblib")
-                joblib.dump(model, model_file)
-                logging.info(f"Saved model for {target} at {model_file}")
+            # XGBoost releases the GIL while training, so threads run the
+            # targets in parallel without copying self.X into worker processes
+            results = Parallel(n_jobs=self.n_workers, backend="threading")(
+                delayed(self._train_one)(i, target)
+                for i, target in enumerate(self.target_cols)
+            )
+            self.metrics = dict(results)
 
             with open(self.metrics_path, "w") as f:
                 for t, m in self.metrics.items():
@@ -27,7 +27,7 @@ class TrainingController:
             return False
         
         for target in self.target_cols:
-            model_path = os.path.join(self.finetuned_models_dir, f"xgb_{target}.joblib")
+            model_path = os.path.join(self.finetuned_models_dir, f"xgb_{target}_finetuned.ubj")
             if not os.path.exists(model_path):
                 return False
         return True   
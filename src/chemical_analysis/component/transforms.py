@@ -0,0 +1,18 @@
+import numpy as np
+
+
+# Closed-form variance stabilisers used by the feature preprocessor. They live
+# in an importable module (not the feature_engineering03 script) so the pickled
+# preprocessor references `src.chemical_analysis.component.transforms.*` and
+# loads outside the training run.
+def signed_log1p(x):
+    return np.sign(x) * np.log1p(np.abs(x))
+
+
+def signed_expm1(x):
+    return np.sign(x) * np.expm1(np.abs(x))
+
+
+def arcsine_sqrt(x):
+    # maps indices in [-1, 1] onto [0, pi/2]
+    return np.arcsin(np.sqrt(np.clip((x + 1) / 2, 0, 1)))
@@ -1,8 +1,12 @@
 import os
 import sys
+import json
 import ee
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 from src.logging import logging
 from src.exception import CustomException
@@ -10,9 +14,15 @@ from src.exception import CustomException
 
 
 class EarthEngineDataFetcher:
+    # computePixels caps a response at ~48 MB; ~20 float64 bands per pixel
+    MAX_GRID_PIXELS = 250_000
+
     def __init__(self, project_id: str = "gee-hackathon-485713"):
         self.project_id = project_id
         self.S2_BANDS = ["B2","B3","B4","B8","B11","B12"]
+        # server results keyed on the serialized request graph
+        self.cache_size = 64
+        self._result_cache: "OrderedDict[tuple, Any]" = OrderedDict()
         self._initialize_ee()
     
     def _initialize_ee(self):
@@ -28,30 +38,63 @@ class EarthEngineDataFetcher:
             logging.error("Earth Engine Init failed")
             raise CustomException(e, sys)
     
+    # Static dataset handles, built once per fetcher after ee.Initialize()
+    @cached_property
+    def _s2_collection(self) -> ee.ImageCollection:
+        return ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
+
+    @cached_property
+    def _gldas_collection(self) -> ee.ImageCollection:
+        return ee.ImageCollection("NASA/GLDAS/V021/NOAH/G025/T3H")
+
+    @cached_property
+    def _terrain_image(self) -> ee.Image:
+        dem = ee.Image("USGS/SRTMGL1_003").select("elevation")
+        slope = ee.Terrain.slope(dem).rename("slope")
+        return dem.addBands(slope)
+
+    @staticmethod
+    def _date_window(start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, str]:
+        # fill missing bounds from a single clock read: the last two years
+        if start_date is not None and end_date is not None:
+            return start_date, end_date
+
+        now = datetime.now()
+        if end_date is None:
+            end_date = now.strftime("%Y-%m-%d")
+        if start_date is None:
+            start_date = (now - timedelta(days=730)).strftime("%Y-%m-%d")
+        return start_date, end_date
+
+    def _cached(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        if key in self._result_cache:
+            self._result_cache.move_to_end(key)
+            return self._result_cache[key]
+
+        value = compute()
+        self._result_cache[key] = value
+        if len(self._result_cache) > self.cache_size:
+            self._result_cache.popitem(last=False)
+        return value
+
     def _mask_s2_sr(self, image):
-        scl = image.select("SCL")
-        mask = (
-            scl.neq(3)   # Cloud shadows
-            .And(scl.neq(7))  # Cloud medium probability
-            .And(scl.neq(8))  # Cloud high probability
-            .And(scl.neq(9))  # Cirrus
-            .And(scl.neq(10)) # Snow/ice
-            .And(scl.neq(11)) # Saturated/defective
+        # one lookup instead of a chain of neq/And images: cloud shadow (3),
+        # cloud medium/high probability (7, 8), cirrus (9), snow/ice (10) and
+        # saturated/defective (11) map to 0, every other class keeps the pixel
+        mask = image.select("SCL").remap(
+            [3, 7, 8, 9, 10, 11], [0, 0, 0, 0, 0, 0], 1
         )
-        
-        return ( image.updateMask(mask).select(self.S2_BANDS).divide(10000) )
+
+        return ( image.select(self.S2_BANDS).updateMask(mask).divide(10000) )
     
     def fetch_satellite_data( self, geometry: ee.Geometry, start_date: str = None, end_date: str = None, cloud_threshold: int = 20 ) -> ee.Image:
         try:
-            if end_date is None:
-                end_date = datetime.now().strftime("%Y-%m-%d")
-            if start_date is None:
-                start_date = (datetime.now() - timedelta(days=730)).strftime("%Y-%m-%d")
+            start_date, end_date = self._date_window(start_date, end_date)
             
             logging.info(f"Fetching Sentinel-2 data from {start_date} to {end_date}")
             
             s2_collection = (
-                ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
+                self._s2_collection
                 .filterDate(start_date, end_date)
                 .filterBounds(geometry)
                 .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", cloud_threshold))
@@ -83,24 +126,19 @@ class EarthEngineDataFetcher:
     def fetch_terrain_data(self, geometry: ee.Geometry) -> ee.Image:
         try:
             logging.info("Fetching terrain data ........")
-            dem = ee.Image("USGS/SRTMGL1_003").select("elevation")
-            slope = ee.Terrain.slope(dem).rename("slope")
-            terrain = dem.addBands(slope)
-            return terrain
+            # geometry-independent; fetch_all_features clips to the AOI
+            return self._terrain_image
         except Exception as e:
             logging.error("Error fetching terrain data")
             raise CustomException(e, sys)
     
     def fetch_climate_data( self, geometry: ee.Geometry, start_date: str = None, end_date: str = None ) -> ee.Image:
         try:
-            if end_date is None:
-                end_date = datetime.now().strftime("%Y-%m-%d")
-            if start_date is None:
-                start_date = (datetime.now() - timedelta(days=730)).strftime("%Y-%m-%d")
+            start_date, end_date = self._date_window(start_date, end_date)
             
             logging.info(f"Fetching GLDAS climate data from {start_date} to {end_date}")
             gldas = (
-                ee.ImageCollection("NASA/GLDAS/V021/NOAH/G025/T3H")
+                self._gldas_collection
                 .filterDate(start_date, end_date)
                 .select(["Rainf_tavg","SoilMoi0_10cm_inst","Tair_f_inst","Evap_tavg"])
                 .mean()
@@ -114,55 +152,179 @@ class EarthEngineDataFetcher:
     def fetch_all_features( self, geometry: ee.Geometry, start_date: str = None, end_date: str = None, scale: int = 100, max_pixels: int = 10000 ) -> ee.Image:
         try:
             logging.info("Fetching all features for AOI .......")
-            
-            satellite = self.fetch_satellite_data(geometry, start_date, end_date)
-            terrain = self.fetch_terrain_data(geometry)
-            climate = self.fetch_climate_data(geometry, start_date, end_date)
-            combined = (
-                satellite
-                .addBands(terrain)
-                .addBands(climate)
-                .clip(geometry)
+
+            start_date, end_date = self._date_window(start_date, end_date)
+
+            # hand back the same image node for a repeated AOI/window, so the
+            # mean and sample requests built on it share one server-side graph
+            return self._cached(
+                ("features", geometry.serialize(), start_date, end_date),
+                lambda: self._combine_features(geometry, start_date, end_date)
             )
-            return combined
         except Exception as e:
             logging.error("Error fetching all features")
             raise CustomException(e, sys)
     
+    def _combine_features(self, geometry: ee.Geometry, start_date: str, end_date: str) -> ee.Image:
+        satellite = self.fetch_satellite_data(geometry, start_date, end_date)
+        terrain = self.fetch_terrain_data(geometry)
+        climate = self.fetch_climate_data(geometry, start_date, end_date)
+        return (
+            satellite
+            .addBands(terrain)
+            .addBands(climate)
+            .clip(geometry)
+        )
+
+    def _pixel_grid(self, geometry: ee.Geometry, scale: int) -> Optional[Dict]:
+        # EPSG:4326 grid over the AOI bounds, or None when the geometry is
+        # server-computed or the grid exceeds the computePixels size budget
+        try:
+            geojson = geometry.toGeoJSON()
+        except ee.EEException:
+            return None
+        if geojson["type"] not in ("Polygon", "MultiPolygon"):
+            return None
+
+        coords = geojson["coordinates"]
+        while isinstance(coords[0][0], list):
+            coords = [pt for ring in coords for pt in ring]
+        lons, lats = zip(*coords)
+
+        step = scale / 111_320
+        width = max(1, int(np.ceil((max(lons) - min(lons)) / step)))
+        height = max(1, int(np.ceil((max(lats) - min(lats)) / step)))
+        if width * height > self.MAX_GRID_PIXELS:
+            return None
+
+        return {
+            "dimensions": {"width": width, "height": height},
+            "affineTransform": {
+                "scaleX": step, "shearX": 0, "translateX": min(lons),
+                "shearY": 0, "scaleY": -step, "translateY": max(lats),
+            },
+            "crsCode": "EPSG:4326",
+        }
+
     def sample_to_dataframe( self, image: ee.Image, geometry: ee.Geometry, scale: int = 100, num_pixels: int = 1000, seed: int = 42 ) -> pd.DataFrame:
         try:
             logging.info(f"Sampling {num_pixels} pixels from image")
-            samples = image.sample(
-                region=geometry,
-                scale=scale,
-                numPixels=num_pixels,
-                seed=seed,
-                geometries=False
-            )
-            
-            features = samples.getInfo()['features']
-            data = [feature['properties'] for feature in features]
-            df = pd.DataFrame(data)
-            return df
+
+            grid = self._pixel_grid(geometry, scale)
+            if grid is None:
+                return self._sample_server_side(image, geometry, scale, num_pixels, seed)
+
+            # binary NumPy transfer of the whole AOI, then sample locally;
+            # "_valid" flags pixels inside the AOI with every band unmasked
+            valid = image.mask().reduce(ee.Reducer.min()).rename("_valid")
+            expression = image.unmask(0).addBands(valid.unmask(0))
+            pixels = self._cached(
+                ("pixels", expression.serialize(), json.dumps(grid, sort_keys=True)),
+                lambda: ee.data.computePixels({
+                    "expression": expression,
+                    "fileFormat": "NUMPY_NDARRAY",
+                    "grid": grid,
+                }),
+            ).ravel()
+
+            pixels = pixels[pixels["_valid"] > 0]
+            rng = np.random.default_rng(seed)
+            pick = rng.choice(len(pixels), size=min(num_pixels, len(pixels)), replace=False)
+
+            df = pd.DataFrame.from_records(pixels[np.sort(pick)])
+            return df.drop(columns="_valid")
         except Exception as e:
             logging.error("Error sampling image to DataFrame")
             raise CustomException(e, sys)
+
+    def _sample_server_side( self, image: ee.Image, geometry: ee.Geometry, scale: int, num_pixels: int, seed: int ) -> pd.DataFrame:
+        samples = image.sample(
+            region=geometry,
+            scale=scale,
+            projection="EPSG:4326",
+            numPixels=num_pixels,
+            seed=seed,
+            geometries=False
+        )
+
+        # column-oriented on the server: one list per band instead of
+        # one properties dict per pixel
+        names = image.bandNames()
+        columns = ee.Dictionary({
+            "names": names,
+            "values": names.map(lambda name: samples.aggregate_array(name)),
+        })
+
+        # serialize() is client-side, so identical requests skip the round-trip
+        result = self._cached(("sample", columns.serialize()), columns.getInfo)
+        return pd.DataFrame(dict(zip(result["names"], result["values"])))
     
     def get_mean_values( self, image: ee.Image, geometry: ee.Geometry, scale: int = 100 ) -> Dict[str, float]:
         try:
             logging.info("Computing mean values for AOI")
             
-            mean_dict = image.reduceRegion(
+            reduced = image.reduceRegion(
                 reducer=ee.Reducer.mean(),
                 geometry=geometry,
                 scale=scale,
+                crs="EPSG:4326",
                 maxPixels=1e9
-            ).getInfo()
-            return mean_dict
+            )
+            mean_dict = self._cached(("mean", reduced.serialize()), reduced.getInfo)
+            return dict(mean_dict)
         except Exception as e:
             logging.error("Error computing mean values")
             raise CustomException(e, sys)
     
+    def _stats_reduction(self, image: ee.Image, geometry: ee.Geometry, scale: int) -> ee.Dictionary:
+        # mean and stdDev share one pass over the pixels: {band}_mean, {band}_stdDev
+        return image.reduceRegion(
+            reducer=ee.Reducer.mean().combine(ee.Reducer.stdDev(), sharedInputs=True),
+            geometry=geometry,
+            scale=scale,
+            crs="EPSG:4326",
+            maxPixels=1e9
+        )
+
+    def get_stats( self, image: ee.Image, geometry: ee.Geometry, scale: int = 100 ) -> Dict[str, float]:
+        try:
+            logging.info("Computing mean/stdDev statistics for AOI")
+
+            reduced = self._stats_reduction(image, geometry, scale)
+            stats = self._cached(("stats", reduced.serialize()), reduced.getInfo)
+            return dict(stats)
+        except Exception as e:
+            logging.error("Error computing AOI statistics")
+            raise CustomException(e, sys)
+
+    def get_stats_and_sample( self, image: ee.Image, geometry: ee.Geometry, scale: int = 100, num_pixels: int = 1000, seed: int = 42 ) -> Tuple[Dict[str, float], pd.DataFrame]:
+        try:
+            logging.info(f"Computing AOI statistics and sampling {num_pixels} pixels")
+
+            samples = image.sample(
+                region=geometry,
+                scale=scale,
+                projection="EPSG:4326",
+                numPixels=num_pixels,
+                seed=seed,
+                geometries=False
+            )
+            names = image.bandNames()
+
+            # statistics and column-wise samples come back in one response
+            payload = ee.Dictionary({
+                "stats": self._stats_reduction(image, geometry, scale),
+                "names": names,
+                "values": names.map(lambda name: samples.aggregate_array(name)),
+            })
+            result = self._cached(("stats_sample", payload.serialize()), payload.getInfo)
+
+            df = pd.DataFrame(dict(zip(result["names"], result["values"])))
+            return dict(result["stats"]), df
+        except Exception as e:
+            logging.error("Error computing AOI statistics and samples")
+            raise CustomException(e, sys)
+
     @staticmethod
     def create_geometry_from_coords(coordinates: List[List[float]]) -> ee.Geometry:
         return ee.Geometry.Polygon(coordinates)
@@ -3,10 +3,57 @@ import sys
 import joblib
 import numpy as np
 import pandas as pd
+import xgboost as xgb
+from numba import njit, prange
+from sklearn.preprocessing import StandardScaler
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 from src.logging import logging
 from src.exception import CustomException
 
+# below this many rows the host-to-device copy costs more than the GPU saves;
+# benchmarks/gpu_min_batch.py measures the crossover on a given machine
+GPU_MIN_BATCH = int(os.getenv("GPU_MIN_BATCH", "10000"))
+
+# Each nutrient's advice is encoded as 0 (none), 1 (reduce) or 2 + dose (apply),
+# and every message is built once here. Doses are whole kg/ha; the ceiling is far
+# beyond any dose a plausible prediction produces
+MAX_DOSE = 255
+NUTRIENTS = ("Nitrogen", "Phosphorus", "Potassium")
+ADVICE_MESSAGES = {
+    nutrient: ["", f"Reduce {nutrient} application"]
+    + [f"Apply {dose}kg/ha {nutrient}" for dose in range(MAX_DOSE + 1)]
+    for nutrient in NUTRIENTS
+}
+PH_MESSAGES = ("", "Apply lime to increase pH", "Apply sulfur to decrease pH")
+BALANCED_MESSAGE = "Soil nutrients are balanced - maintain current practices"
+
+
+@njit(cache=True)
+def _nutrient_code(value, low, high, dose):
+    # NaN fails both comparisons and gets no advice
+    if value < low:
+        return 2 + min(max(int(dose), 0), MAX_DOSE)
+    if value > high:
+        return 1
+    return 0
+
+
+@njit(parallel=True, cache=True)
+def _recommendation_codes(n, p, k, ph, out):
+    # Nitrogen (ideal: 250-350 mg/kg), Phosphorus (ideal: 30-60 mg/kg),
+    # Potassium (ideal: 150-250 mg/kg), pH (ideal: 6.0-7.5)
+    for i in prange(n.size):
+        out[i, 0] = _nutrient_code(n[i], 200.0, 400.0, (250.0 - n[i]) * 0.15)
+        out[i, 1] = _nutrient_code(p[i], 25.0, 80.0, (40.0 - p[i]) * 0.2)
+        out[i, 2] = _nutrient_code(k[i], 120.0, 300.0, (180.0 - k[i]) * 0.12)
+        out[i, 3] = 1 if ph[i] < 5.5 else (2 if ph[i] > 8.0 else 0)
+
+
+def _recommendation_text(codes: np.ndarray) -> str:
+    parts = [ADVICE_MESSAGES[nutrient][code] for nutrient, code in zip(NUTRIENTS, codes[:3])]
+    parts.append(PH_MESSAGES[codes[3]])
+    return "; ".join(part for part in parts if part) or BALANCED_MESSAGE
 
 class InferencePipeline:
     def __init__(self, use_finetuned: bool = True):
@@ -16,8 +63,16 @@ class InferencePipeline:
             'B11', 'B12', 'B2', 'B3', 'B4', 'B8', 'Evap_tavg', 'NDVI', 'NDWI', 'Rainf_tavg', 'SAVI',
             'SoilMoi0_10cm_inst', 'Tair_f_inst', 'elevation', 'slope'
         ]
+        self._feature_cols_set = frozenset(self.feature_cols)
         self.preprocessor = None
+        self.medians = None
         self.models = {}
+        # "cuda" adds GPU copies of the boosters for large batches only
+        self.device = os.getenv("XGB_DEVICE", "cpu")
+        self.gpu_models = {}
+        self._cupy = None
+        # XGBoost releases the GIL in predict, so the targets run side by side
+        self._target_pool = ThreadPoolExecutor(max_workers=len(self.target_cols))
         self._load_artifacts()
 
     def _load_artifacts(self):
@@ -27,39 +82,108 @@ class InferencePipeline:
                 raise FileNotFoundError(f"Preprocessor not found at {preprocessor_path}")
             
             self.preprocessor = joblib.load(preprocessor_path)
+            # n_jobs=-1 helps the training-time fit, but dispatching four tiny
+            # transforms to worker processes dwarfs a one-row transform
+            self.preprocessor.set_params(n_jobs=None)
+            self._scalers_to_float32()
 
-            if self.use_finetuned:
-                models_dir = "artifacts/finetuned_models"
-                model_suffix = "_finetuned"
+            medians_path = "artifacts/feature_medians.joblib"
+            if os.path.exists(medians_path):
+                self.medians = joblib.load(medians_path).reindex(self.feature_cols).astype(np.float32)
             else:
-                models_dir = "artifacts/models"
-                model_suffix = ""
-
-            for target in self.target_cols:
-                model_path = os.path.join(models_dir, f"xgb_{target}{model_suffix}.joblib")
-                
-                if not os.path.exists(model_path):
-                    if self.use_finetuned:
-                        logging.warning(f"Finetuned model not found for {target}, using pretrained")
-                        model_path = os.path.join("artifacts/models", f"xgb_{target}.joblib")
-                    
-                    if not os.path.exists(model_path):
-                        raise FileNotFoundError(f"Model not found: {model_path}")
-                
-                self.models[target] = joblib.load(model_path)
-                logging.info(f"Loaded model for {target} from {model_path}")
+                logging.warning(f"Feature medians not found at {medians_path}; missing inputs will not be imputed")
+
+            # joblib/pickle I/O releases the GIL, so the targets load concurrently
+            with ThreadPoolExecutor(max_workers=len(self.target_cols)) as ex:
+                self.models = dict(zip(self.target_cols, ex.map(self._load_one_model, self.target_cols)))
+
+            if self.device.startswith("cuda"):
+                self._load_gpu_models()
         except Exception as e:
             logging.error("Error loading inference artifacts")
             raise CustomException(e, sys)
     
+    def _load_gpu_models(self):
+        # a GPU booster fed a host array warns and copies it into a DMatrix on
+        # every call, so the GPU path needs CuPy to hand it device memory
+        try:
+            import cupy
+        except ImportError:
+            logging.warning(f"XGB_DEVICE={self.device} but CuPy is not installed; predicting on CPU")
+            return
+
+        self._cupy = cupy
+        self._gpu_index = int(self.device.partition(":")[2] or 0)
+        for target, booster in self.models.items():
+            gpu_booster = booster.copy()
+            gpu_booster.set_param({"device": self.device})
+            self.gpu_models[target] = gpu_booster
+        logging.info(f"GPU boosters ready on {self.device} for batches of {GPU_MIN_BATCH}+ rows")
+
+    def _predict_gpu(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        cp = self._cupy
+        with cp.cuda.Device(self._gpu_index):
+            # one host-to-device copy shared by all four targets
+            X_gpu = cp.asarray(X)
+            return {
+                target: cp.asnumpy(self.gpu_models[target].inplace_predict(X_gpu))
+                for target in self.target_cols
+            }
+
+    def _load_one_model(self, target: str) -> xgb.Booster:
+        if self.use_finetuned:
+            model_path = os.path.join("artifacts/finetuned_models", f"xgb_{target}_finetuned.ubj")
+        else:
+            model_path = os.path.join("artifacts/models", f"xgb_{target}.joblib")
+
+        if not os.path.exists(model_path):
+            if self.use_finetuned:
+                logging.warning(f"Finetuned model not found for {target}, using pretrained")
+                model_path = os.path.join("artifacts/models", f"xgb_{target}.joblib")
+
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(f"Model not found: {model_path}")
+
+        # keep the bare booster; the sklearn wrapper only adds per-call overhead.
+        # Fine-tuned models are saved as native boosters, pretrained as regressors
+        if model_path.endswith(".ubj"):
+            booster = xgb.Booster(model_file=model_path)
+        else:
+            booster = joblib.load(model_path).get_booster()
+        # models may have been trained with device="cuda"; serve on CPU
+        booster.set_param({"device": "cpu"})
+        # the four targets predict concurrently; split the cores between them
+        booster.set_param({"nthread": max(1, (os.cpu_count() or 1) // len(self.target_cols))})
+        logging.info(f"Loaded model for {target} from {model_path}")
+        return booster
+
+    def _scalers_to_float32(self):
+        # sklearn keeps fitted statistics in float64; match them to the
+        # float32 inputs so the transform never upcasts
+        for _, transformer, _ in self.preprocessor.transformers_:
+            steps = getattr(transformer, "steps", [(None, transformer)])
+            for _, step in steps:
+                if isinstance(step, StandardScaler):
+                    step.mean_ = step.mean_.astype(np.float32)
+                    step.scale_ = step.scale_.astype(np.float32)
+
+    def warmup(self):
+        """Run one throwaway prediction so the first request doesn't pay for
+        page faults and XGBoost's lazy predictor setup."""
+        self.predict_many([dict.fromkeys(self.feature_cols, 0.0)])
+
     def _validate_features(self, df: pd.DataFrame) -> pd.DataFrame:
         try:
-            missing_cols= set(self.feature_cols) -set(df.columns)
+            missing_cols = self._feature_cols_set.difference(df.columns)
             if missing_cols:
                 raise ValueError(f"Missing features: {missing_cols}")
             
-            df_features = df[self.feature_cols].copy()
-            if df_features.isnull().any().any():
+            # a view; fillna returns a new frame only where imputation is needed
+            df_features = df[self.feature_cols].astype(np.float32, copy=False)
+            if self.medians is not None:
+                # no-op on clean rows, so no isnull() scan first
+                df_features = df_features.fillna(self.medians)
+            elif df_features.isna().to_numpy().any():
                 logging.warning("NaN values detected in features. Filling with median.")
                 df_features = df_features.fillna(df_features.median())
             return df_features
@@ -68,28 +192,80 @@ class InferencePipeline:
         
     def predict(self, features: Dict[str, float]) -> Dict[str, float]:
         try:
-            df = pd.DataFrame([features])
-            df = self._validate_features(df)
-            X_transformed = self.preprocessor.transform(df)
-
-            predictions = {}
-            for target in self.target_cols:
-                pred = self.models[target].predict(X_transformed)[0]
-                predictions[target] = float(pred)
-            return predictions
+            missing_cols = self._feature_cols_set.difference(features)
+            if missing_cols:
+                raise ValueError(f"Missing features: {missing_cols}")
+
+            # one row straight into NumPy; Earth Engine reports masked bands as None
+            x = np.fromiter(
+                (np.nan if features[c] is None else features[c] for c in self.feature_cols),
+                dtype=np.float32,
+                count=len(self.feature_cols),
+            ).reshape(1, -1)
+            if self.medians is not None:
+                x = np.where(np.isnan(x), self.medians.to_numpy(), x)
+
+            # the ColumnTransformer selects by name, so it still needs column labels
+            X_transformed = np.ascontiguousarray(
+                self.preprocessor.transform(pd.DataFrame(x, columns=self.feature_cols)),
+                dtype=np.float32,
+            )
+            return {
+                target: float(self.models[target].inplace_predict(X_transformed)[0])
+                for target in self.target_cols
+            }
         except Exception as e:
             logging.error("Error during single prediction")
             raise CustomException(e, sys)
-        
+
+    def predict_many(self, features_list: List[Dict[str, float]]) -> List[Dict[str, float]]:
+        try:
+            df = pd.DataFrame(features_list)
+            missing_cols = self._feature_cols_set.difference(df.columns)
+            if missing_cols:
+                raise ValueError(f"Missing features: {missing_cols}")
+
+            # rows come from unrelated requests, so impute from the training
+            # medians rather than from the batch
+            df_features = df[self.feature_cols].astype(np.float32, copy=False)
+            if self.medians is not None:
+                df_features = df_features.fillna(self.medians)
+
+            X_transformed = np.ascontiguousarray(
+                self.preprocessor.transform(df_features), dtype=np.float32
+            )
+
+            preds = {
+                target: self.models[target].inplace_predict(X_transformed)
+                for target in self.target_cols
+            }
+            return [
+                {target: float(preds[target][i]) for target in self.target_cols}
+                for i in range(len(df))
+            ]
+        except Exception as e:
+            logging.error("Error during batched prediction")
+            raise CustomException(e, sys)
+
     def predict_batch(self, df: pd.DataFrame)-> pd.DataFrame:
         try:
             logging.info(f"Batch prediction for {len(df)} samples")
             df_features = self._validate_features(df)
-            X_transformed = self.preprocessor.transform(df_features)
+            # boosters read the array in place; no DMatrix to build
+            X_transformed = np.ascontiguousarray(
+                self.preprocessor.transform(df_features), dtype=np.float32
+            )
+
             predictions_dict = {}
-            for target in self.target_cols:
-                predictions = self.models[target].predict(X_transformed)
-                predictions_dict[f"{target}_predicted"] = predictions
+            if self.gpu_models and len(df) >= GPU_MIN_BATCH:
+                for target, preds in self._predict_gpu(X_transformed).items():
+                    predictions_dict[f"{target}_predicted"] = preds
+            else:
+                predictions = self._target_pool.map(
+                    lambda target: self.models[target].inplace_predict(X_transformed), self.target_cols
+                )
+                for target, preds in zip(self.target_cols, predictions):
+                    predictions_dict[f"{target}_predicted"] = preds
             results = df.copy()
             for target, preds in predictions_dict.items():
                 results[target] = preds
@@ -99,56 +275,35 @@ class InferencePipeline:
             logging.error("Error in batch prediction")
             raise CustomException(e, sys)
 
-    def predict_from_earth_engine_data(self, ee_data: pd.DataFrame) -> pd.DataFrame:
+    def predict_from_earth_engine_data(self, ee_data: pd.DataFrame, with_recommendations: bool = True) -> pd.DataFrame:
         try:
             results = self.predict_batch(ee_data)
-            results = self._add_recommendations(results)
+            # raster consumers only need the predicted columns
+            if with_recommendations:
+                results = self._add_recommendations(results)
             return results
         except Exception as e:
             raise CustomException(e, sys)
     
     def _add_recommendations(self, df: pd.DataFrame) -> pd.DataFrame:
         try:
-            recommendations = []
-            
-            for _, row in df.iterrows():
-                n_val = row.get('N_predicted', 0)
-                p_val = row.get('P_predicted', 0)
-                k_val = row.get('K_predicted', 0)
-                ph_val = row.get('pH_predicted', 7.0)
-                
-                rec_parts = []
-                
-                # Nitrogen recommendation (ideal: 250-350 mg/kg)
-                if n_val < 200:
-                    rec_parts.append(f"Apply {int((250 - n_val) * 0.15)}kg/ha Nitrogen")
-                elif n_val > 400:
-                    rec_parts.append("Reduce Nitrogen application")
-                
-                # Phosphorus recommendation (ideal: 30-60 mg/kg)
-                if p_val < 25:
-                    rec_parts.append(f"Apply {int((40 - p_val) * 0.2)}kg/ha Phosphorus")
-                elif p_val > 80:
-                    rec_parts.append("Reduce Phosphorus application")
-                
-                # Potassium recommendation (ideal: 150-250 mg/kg)
-                if k_val < 120:
-                    rec_parts.append(f"Apply {int((180 - k_val) * 0.12)}kg/ha Potassium")
-                elif k_val > 300:
-                    rec_parts.append("Reduce Potassium application")
-                
-                # pH recommendation (ideal: 6.0-7.5)
-                if ph_val < 5.5:
-                    rec_parts.append("Apply lime to increase pH")
-                elif ph_val > 8.0:
-                    rec_parts.append("Apply sulfur to decrease pH")
-                
-                if not rec_parts:
-                    recommendations.append("Soil nutrients are balanced - maintain current practices")
-                else:
-                    recommendations.append("; ".join(rec_parts))
-            
-            df['recommendation'] = recommendations
+            def column(name: str, default: float) -> np.ndarray:
+                if name in df:
+                    return df[name].to_numpy(dtype=np.float64)
+                return np.full(len(df), default)
+
+            n_val = column('N_predicted', 0)
+            p_val = column('P_predicted', 0)
+            k_val = column('K_predicted', 0)
+            ph_val = column('pH_predicted', 7.0)
+
+            codes = np.empty((len(df), 4), dtype=np.int16)
+            _recommendation_codes(n_val, p_val, k_val, ph_val, codes)
+
+            # far fewer distinct advice combinations than rows: build each text once
+            combos, inverse = np.unique(codes, axis=0, return_inverse=True)
+            messages = np.array([_recommendation_text(c) for c in combos], dtype=object)
+            df['recommendation'] = messages[inverse.ravel()]
             return df
         
         except Exception as e:
@@ -1,12 +1,12 @@
 """
 Industrial Facilities API routes
 """
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
-from src.predict_toxicity.services.facilities_service import FacilitiesService
+from src.predict_toxicity.services.facilities_service import FacilitiesService, get_facilities_service
 
 router = APIRouter()
 
@@ -35,7 +35,8 @@ async def search_facilities(
     pollutant: Optional[str] = Query(None, description="Filter by pollutant type"),
     year: Optional[int] = Query(None, description="Filter by reporting year"),
     bbox: Optional[str] = Query(None, description="Bounding box: min_lon,min_lat,max_lon,max_lat"),
-    limit: int = Query(100, ge=1, le=1000, description="Maximum results")
+    limit: int = Query(100, ge=1, le=1000, description="Maximum results"),
+    service: FacilitiesService = Depends(get_facilities_service)
 ):
     """
     Search industrial facilities with various filters
@@ -48,8 +49,6 @@ async def search_facilities(
     - **limit**: Maximum number of results
     """
     
-    service = FacilitiesService()
-    
     filters = {
         "country": country,
         "sector": sector,
@@ -69,14 +68,13 @@ async def search_facilities(
     )
 
 @router.get("/{facility_id}", response_model=FacilityResponse)
-async def get_facility(facility_id: str):
+async def get_facility(facility_id: str, service: FacilitiesService = Depends(get_facilities_service)):
     """
     Get detailed information about a specific facility
     
     - **facility_id**: Facility identifier
     """
     
-    service = FacilitiesService()
     facility = service.get_by_id(facility_id)
     
     if not facility:
@@ -85,14 +83,13 @@ async def get_facility(facility_id: str):
     return facility
 
 @router.get("/{facility_id}/pollutants")
-async def get_facility_pollutants(facility_id: str):
+async def get_facility_pollutants(facility_id: str, service: FacilitiesService = Depends(get_facilities_service)):
     """
     Get list of pollutants released by a facility
     
     - **facility_id**: Facility identifier
     """
     
-    service = FacilitiesService()
     pollutants = service.get_pollutants(facility_id)
     
     return {
@@ -104,7 +101,8 @@ async def get_facility_pollutants(facility_id: str):
 async def get_emissions_history(
     facility_id: str,
     start_year: Optional[int] = None,
-    end_year: Optional[int] = None
+    end_year: Optional[int] = None,
+    service: FacilitiesService = Depends(get_facilities_service)
 ):
     """
     Get historical emissions data for a facility
@@ -114,7 +112,6 @@ async def get_emissions_history(
     - **end_year**: End year for historical data
     """
     
-    service = FacilitiesService()
     history = service.get_emissions_history(
         facility_id,
         start_year,
@@ -131,7 +128,8 @@ async def get_nearby_facilities(
     lat: float = Query(..., description="Latitude"),
     lon: float = Query(..., description="Longitude"),
     radius_km: float = Query(10.0, ge=0.1, le=100.0, description="Search radius in km"),
-    limit: int = Query(50, ge=1, le=500)
+    limit: int = Query(50, ge=1, le=500),
+    service: FacilitiesService = Depends(get_facilities_service)
 ):
     """
     Find facilities within a radius of a point
@@ -142,7 +140,6 @@ async def get_nearby_facilities(
     - **limit**: Maximum number of results
     """
     
-    service = FacilitiesService()
     facilities = service.get_nearby(lat, lon, radius_km, limit)
     
     return {
@@ -156,7 +153,8 @@ async def get_nearby_facilities(
 async def get_statistics_summary(
     country: Optional[str] = None,
     sector: Optional[str] = None,
-    year: Optional[int] = None
+    year: Optional[int] = None,
+    service: FacilitiesService = Depends(get_facilities_service)
 ):
     """
     Get statistical summary of facilities and emissions
@@ -166,7 +164,6 @@ async def get_statistics_summary(
     - **year**: Filter by year
     """
     
-    service = FacilitiesService()
     stats = service.get_statistics(country, sector, year)
     
     return stats
\ No newline at end of file
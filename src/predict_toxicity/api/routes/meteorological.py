@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 
-from src.predict_toxicity.services.meteorological_service import MeteorologicalService
+from src.predict_toxicity.services.meteorological_service import MeteorologicalService, get_meteorological_service
 
 router = APIRouter()
 
@@ -29,7 +29,8 @@ class DispersionParameters(BaseModel):
 @router.get("/current", response_model=WeatherData)
 async def get_current_weather(
     lat: float = Query(..., description="Latitude"),
-    lon: float = Query(..., description="Longitude")
+    lon: float = Query(..., description="Longitude"),
+    service: MeteorologicalService = Depends(get_meteorological_service)
 ):
     """
     Get current meteorological conditions for a location
@@ -38,7 +39,6 @@ async def get_current_weather(
     - **lon**: Longitude
     """
     
-    service = MeteorologicalService()
     weather = service.get_current_weather(lat, lon)
     
     if not weather:
@@ -52,7 +52,8 @@ async def get_historical_weather(
     lon: float = Query(..., description="Longitude"),
     start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: str = Query(..., description="End date (YYYY-MM-DD)"),
-    parameters: Optional[str] = Query(None, description="Comma-separated parameters")
+    parameters: Optional[str] = Query(None, description="Comma-separated parameters"),
+    service: MeteorologicalService = Depends(get_meteorological_service)
 ):
     """
     Get historical weather data for a location and time period
@@ -64,8 +65,6 @@ async def get_historical_weather(
     - **parameters**: Specific parameters to retrieve
     """
     
-    service = MeteorologicalService()
-    
     try:
         start = datetime.fromisoformat(start_date)
         end = datetime.fromisoformat(end_date)
@@ -86,7 +85,8 @@ async def get_historical_weather(
 async def get_dispersion_parameters(
     lat: float = Query(..., description="Latitude"),
     lon: float = Query(..., description="Longitude"),
-    timestamp: Optional[str] = Query(None, description="ISO timestamp (default: current)")
+    timestamp: Optional[str] = Query(None, description="ISO timestamp (default: current)"),
+    service: MeteorologicalService = Depends(get_meteorological_service)
 ):
     """
     Get atmospheric dispersion parameters for pollution modeling
@@ -96,8 +96,6 @@ async def get_dispersion_parameters(
     - **timestamp**: Specific timestamp (optional)
     """
     
-    service = MeteorologicalService()
-    
     if timestamp:
         try:
             dt = datetime.fromisoformat(timestamp)
@@ -117,7 +115,8 @@ async def get_wind_field(
     max_lat: float = Query(..., description="Maximum latitude"),
     max_lon: float = Query(..., description="Maximum longitude"),
     timestamp: Optional[str] = Query(None, description="ISO timestamp"),
-    resolution: float = Query(0.1, description="Grid resolution in degrees")
+    resolution: float = Query(0.1, description="Grid resolution in degrees"),
+    service: MeteorologicalService = Depends(get_meteorological_service)
 ):
     """
     Get wind field data for a bounding box (for visualization)
@@ -130,8 +129,6 @@ async def get_wind_field(
     - **resolution**: Grid resolution
     """
     
-    service = MeteorologicalService()
-    
     if timestamp:
         try:
             dt = datetime.fromisoformat(timestamp)
@@ -160,7 +157,8 @@ async def get_wind_field(
 async def get_forecast(
     lat: float = Query(..., description="Latitude"),
     lon: float = Query(..., description="Longitude"),
-    hours: int = Query(24, ge=1, le=168, description="Forecast hours ahead")
+    hours: int = Query(24, ge=1, le=168, description="Forecast hours ahead"),
+    service: MeteorologicalService = Depends(get_meteorological_service)
 ):
     """
     Get weather forecast for dispersion modeling
@@ -170,7 +168,6 @@ async def get_forecast(
     - **hours**: Number of hours to forecast
     """
     
-    service = MeteorologicalService()
     forecast = service.get_forecast(lat, lon, hours)
     
     return {
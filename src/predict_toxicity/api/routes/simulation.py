@@ -1,15 +1,28 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any
+import asyncio
+import json
+import math
+import os
+import time
+import numpy as np
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
+from typing import Annotated, List, Dict, Literal, Mapping, Optional, Any, Tuple, Union
+from types import MappingProxyType
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from datetime import datetime
-import uuid
+from itertools import islice
+from threading import RLock
+import secrets
+from cachetools import TTLCache
 
-from src.predict_toxicity.services.simulation_service import SimulationService
-from src.predict_toxicity.services.hydrological_service import HydrologicalService
-from src.predict_toxicity.services.dispersion_service import DispersionService
+from src.predict_toxicity.services.simulation_service import get_simulation_service
 from src.logging import logging as logger
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Pydantic models for request/response
 class CalamityRequest(BaseModel):
@@ -46,12 +59,57 @@ class SimulationResponse(BaseModel):
     estimated_completion_seconds: int
     created_at: datetime
 
+class AffectedMetrics(BaseModel):
+    """Impact estimates; engine-specific figures are kept as extra fields"""
+    model_config = ConfigDict(extra="allow")
+    
+    est_population: int = 0
+    affected_area_km2: float = 0.0
+    primary_toxins: List[str] = []
+    health_risks: List[str] = []
+
+# GeoJSON geometries an engine may report as the affected area
+Position = List[float]
+
+class PointGeometry(BaseModel):
+    type: Literal["Point"]
+    coordinates: Position
+
+class MultiPointGeometry(BaseModel):
+    type: Literal["MultiPoint"]
+    coordinates: List[Position]
+
+class LineStringGeometry(BaseModel):
+    type: Literal["LineString"]
+    coordinates: List[Position]
+
+class MultiLineStringGeometry(BaseModel):
+    type: Literal["MultiLineString"]
+    coordinates: List[List[Position]]
+
+class PolygonGeometry(BaseModel):
+    type: Literal["Polygon"]
+    coordinates: List[List[Position]]
+
+class MultiPolygonGeometry(BaseModel):
+    type: Literal["MultiPolygon"]
+    coordinates: List[List[List[Position]]]
+
+FalloutGeometry = Annotated[
+    Union[
+        PointGeometry, MultiPointGeometry, LineStringGeometry,
+        MultiLineStringGeometry, PolygonGeometry, MultiPolygonGeometry
+    ],
+    Field(discriminator="type")
+]
+_fallout_geometry_adapter = TypeAdapter(FalloutGeometry)
+
 class RiskProfileResponse(BaseModel):
     """Response model for risk profile"""
     simulation_id: str
     critical_radius_km: float
-    affected_metrics: Dict
-    fallout_geometry: Dict
+    affected_metrics: AffectedMetrics
+    fallout_geometry: FalloutGeometry
     health_risks: List[str]
     timestamp: datetime
 
@@ -63,8 +121,166 @@ class SimulationStatus(BaseModel):
     current_step: str
     error_message: Optional[str] = None
 
-# In-memory storage for demonstration (replace with database in production)
-simulations_db = {}
+# In-memory storage for demonstration (replace with database in production);
+# records expire after a day so a long-running server doesn't grow without bound
+SIMULATION_TTL_SECONDS = 86400
+
+@dataclass(slots=True)
+class SimulationRecord:
+    simulation_id: str
+    site_id: str
+    calamity_type: str
+    magnitude: float
+    unit: str
+    status: str
+    engine: str
+    created_at: datetime
+    progress: int = 0
+    current_step: str = "Initializing"
+    results: Optional[Dict] = None
+    error: Optional[str] = None
+    completed_at: Optional[datetime] = None
+
+
+class SimStore:
+    """Bounded simulation registry, also indexed by status so a filtered listing
+    only walks matching records. Records expire oldest first, once older than
+    `ttl` seconds or beyond `maxsize`. One lock guards both indexes; status
+    changes must go through set_status() to keep them in step."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = SIMULATION_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # sim_id -> (monotonic insert time, record), oldest first
+        self._records: "OrderedDict[str, Tuple[float, SimulationRecord]]" = OrderedDict()
+        self._by_status: "defaultdict[str, OrderedDict[str, SimulationRecord]]" = defaultdict(OrderedDict)
+        # (expiry, (status, progress, current_step, error)) per simulation,
+        # replaced whole on every change so pollers can read it without the lock
+        self._status: Dict[str, Tuple[float, Tuple[str, int, str, Optional[str]]]] = {}
+        self._lock = RLock()
+
+    def _expire(self):
+        deadline = time.monotonic() - self.ttl
+        while self._records:
+            sim_id, (inserted, record) = next(iter(self._records.items()))
+            if inserted > deadline and len(self._records) <= self.maxsize:
+                break
+            del self._records[sim_id]
+            self._by_status[record.status].pop(sim_id, None)
+            self._status.pop(sim_id, None)
+
+    def __getitem__(self, sim_id: str) -> SimulationRecord:
+        with self._lock:
+            self._expire()
+            return self._records[sim_id][1]
+
+    def __setitem__(self, sim_id: str, simulation: SimulationRecord):
+        with self._lock:
+            previous = self._records.pop(sim_id, None)
+            if previous is not None:
+                self._by_status[previous[1].status].pop(sim_id, None)
+            self._records[sim_id] = (time.monotonic(), simulation)
+            self._by_status[simulation.status][sim_id] = simulation
+            self._publish(sim_id, simulation)
+            self._expire()
+
+    def __contains__(self, sim_id: str) -> bool:
+        with self._lock:
+            self._expire()
+            return sim_id in self._records
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._records)
+
+    def get(self, sim_id: str, default: Optional[SimulationRecord] = None) -> Optional[SimulationRecord]:
+        with self._lock:
+            self._expire()
+            entry = self._records.get(sim_id)
+            return default if entry is None else entry[1]
+
+    def set_status(self, sim_id: str, status: str):
+        with self._lock:
+            entry = self._records.get(sim_id)
+            if entry is None:
+                return
+            simulation = entry[1]
+            self._by_status[simulation.status].pop(sim_id, None)
+            simulation.status = status
+            self._by_status[status][sim_id] = simulation
+            self._publish(sim_id, simulation)
+
+    def _publish(self, sim_id: str, simulation: SimulationRecord):
+        expires = self._records[sim_id][0] + self.ttl
+        self._status[sim_id] = (expires, (
+            simulation.status, simulation.progress, simulation.current_step, simulation.error
+        ))
+
+    def publish_status(self, sim_id: str):
+        """Refresh the lock-free status snapshot after mutating a record"""
+        with self._lock:
+            entry = self._records.get(sim_id)
+            if entry is not None:
+                self._publish(sim_id, entry[1])
+
+    def status_snapshot(self, sim_id: str) -> Optional[Tuple[str, int, str, Optional[str]]]:
+        # a single dict read of an immutable tuple; no lock needed. _expire
+        # drops evicted entries, and the deadline check covers records past
+        # their TTL that no locked call has swept yet, so this agrees with get()
+        entry = self._status.get(sim_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def snapshot(self) -> List[SimulationRecord]:
+        with self._lock:
+            self._expire()
+            return [simulation for _, simulation in self._records.values()]
+
+    def query(self, status: Optional[str], limit: int) -> Tuple[int, List[SimulationRecord]]:
+        """Total matching records and the first `limit` of them"""
+        with self._lock:
+            self._expire()
+            if not status:
+                return len(self._records), [s for _, s in islice(self._records.values(), limit)]
+
+            shard = self._by_status.get(status, {})
+            return len(shard), list(islice(shard.values(), limit))
+
+simulations_db = SimStore()
+# set once a simulation finishes, so clients can wait instead of polling
+simulation_events: Dict[str, asyncio.Event] = TTLCache(maxsize=10_000, ttl=SIMULATION_TTL_SECONDS)
+# pulsed on every progress change, to wake status streams
+simulation_updates: Dict[str, asyncio.Event] = TTLCache(maxsize=10_000, ttl=SIMULATION_TTL_SECONDS)
+# built once per completed simulation; served with the headers below
+risk_profiles: Dict[str, RiskProfileResponse] = TTLCache(maxsize=10_000, ttl=SIMULATION_TTL_SECONDS)
+RISK_PROFILE_CACHE_CONTROL = f"public, max-age={SIMULATION_TTL_SECONDS}, immutable"
+TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+
+_ENGINE_MAPPING: Mapping[str, str] = MappingProxyType({
+    "flood": "Hydrological_Flow_V1",
+    "earthquake": "Seismic_Impact_V1",
+    "fire": "Atmospheric_Dispersion_V1",
+    "explosion": "Blast_Radius_V1"
+})
+
+# simulations get their own bounded pool so a burst of them can't starve the
+# default threadpool that sync routes and other background work run on
+simulation_executor = ThreadPoolExecutor(
+    max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="simulation"
+)
+
+# dispersion impact estimates: 500 people/km², 40% farmland at 247.105 acres/km²
+_POP_PER_KM2 = 500
+_FARM_ACRES_PER_KM2 = 0.4 * 247.105
+
+# fallback fallout polygon: 32-segment closed circle, unit radius
+KM_PER_DEGREE = 111.0
+_CIRCLE_ANGLES = np.linspace(0, 2 * np.pi, 33)
+_CIRCLE_COS = np.cos(_CIRCLE_ANGLES)
+_CIRCLE_SIN = np.sin(_CIRCLE_ANGLES)
+SSE_KEEPALIVE_SECONDS = 15
 
 @router.post("/calamity", response_model=SimulationResponse)
 async def initiate_calamity_simulation(
@@ -81,33 +297,31 @@ async def initiate_calamity_simulation(
     - **meteorological_conditions**: Optional weather parameters to override
     """
     
-    # Generate simulation ID
-    simulation_id = f"sim_tox_{uuid.uuid4().hex[:6]}"
+    # Generate simulation ID; 64 random bits, and never one still in the store
+    simulation_id = f"sim_tox_{secrets.token_hex(8)}"
+    while simulation_id in simulations_db:
+        simulation_id = f"sim_tox_{secrets.token_hex(8)}"
     
     # Determine simulation engine based on calamity type
-    engine_mapping = {
-        "flood": "Hydrological_Flow_V1",
-        "earthquake": "Seismic_Impact_V1",
-        "fire": "Atmospheric_Dispersion_V1",
-        "explosion": "Blast_Radius_V1"
-    }
-    
-    engine = engine_mapping.get(request.calamity_type.lower(), "Generic_Simulation_V1")
+    engine = _ENGINE_MAPPING.get(request.calamity_type.lower(), "Generic_Simulation_V1")
     
     # Create simulation record
-    simulation = {
-        "simulation_id": simulation_id,
-        "site_id": request.site_id,
-        "calamity_type": request.calamity_type,
-        "magnitude": request.magnitude,
-        "unit": request.unit,
-        "status": "PROCESSING",
-        "engine": engine,
-        "created_at": datetime.now(),
-        "progress": 0
-    }
+    simulation = SimulationRecord(
+        simulation_id=simulation_id,
+        site_id=request.site_id,
+        calamity_type=request.calamity_type,
+        magnitude=request.magnitude,
+        unit=request.unit,
+        status="PROCESSING",
+        engine=engine,
+        created_at=datetime.now()
+    )
     
     simulations_db[simulation_id] = simulation
+    # a profile cached under an expired record's ID must not be served for this one
+    risk_profiles.pop(simulation_id, None)
+    simulation_events[simulation_id] = asyncio.Event()
+    simulation_updates[simulation_id] = asyncio.Event()
     
     # Add background task to run simulation
     background_tasks.add_task(
@@ -121,42 +335,51 @@ async def initiate_calamity_simulation(
     
     logger.info(f"Simulation {simulation_id} initiated for {request.site_id}")
     
-    return SimulationResponse(
+    return SimulationResponse.model_construct(
         simulation_id=simulation_id,
         status="PROCESSING",
         engine=engine,
         estimated_completion_seconds=120,
-        created_at=simulation.get("created_at")
+        created_at=simulation.created_at
     )
 
 @router.get("/risk-profile/{sim_id}", response_model=RiskProfileResponse)
-async def get_risk_profile(sim_id: str):
+async def get_risk_profile(sim_id: str, request: Request, response: Response):
     """
     Retrieve comprehensive risk profile for completed simulation
     
     - **sim_id**: Simulation identifier
     """
     
-    if sim_id not in simulations_db:
+    # one lookup: a record can expire between a membership test and a read
+    simulation = simulations_db.get(sim_id)
+    if simulation is None:
         raise HTTPException(status_code=404, detail="Simulation not found")
     
-    simulation = simulations_db[sim_id]
-    
-    if simulation["status"] != "COMPLETED":
+    if simulation.status != "COMPLETED":
         raise HTTPException(
             status_code=400,
-            detail=f"Simulation is {simulation['status']}. Wait for completion."
+            detail=f"Simulation is {simulation.status}. Wait for completion."
         )
     
-    # Retrieve results from simulation
-    results = simulation.get("results", {})
+    # a completed profile never changes, so clients and proxies may keep it
+    # for as long as the record itself lives; the completion time in the tag
+    # keeps a reissued ID from matching an older simulation's cached copy
+    etag = f'W/"{sim_id}-{simulation.completed_at.timestamp():.6f}"'
+    cache_headers = {"ETag": etag, "Cache-Control": RISK_PROFILE_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == cache_headers["ETag"]:
+        return Response(status_code=304, headers=cache_headers)
     
-    # Extract data based on simulation type
-    if not results:
-        raise HTTPException(
-            status_code=500,
-            detail="Simulation completed but no results available"
-        )
+    profile = risk_profiles.get(sim_id)
+    if profile is None:
+        profile = risk_profiles[sim_id] = _build_risk_profile(sim_id, simulation)
+    
+    response.headers.update(cache_headers)
+    return profile
+
+def _enrich_results(results: Dict) -> Dict:
+    """Fill in the radius, metrics and fallout geometry the risk profile needs,
+    once, when the simulation completes"""
     
     # Get critical radius
     critical_radius = results.get("critical_radius_km", 0.0)
@@ -176,13 +399,15 @@ async def get_risk_profile(sim_id: str):
             max_concentration = max(c.get("concentration_mg_m3", 0) for c in concentrations)
         
         # Calculate affected area from radius
-        affected_area_km2 = results.get("affected_area_km2", 3.14159 * (critical_radius ** 2))
-        est_population = int(affected_area_km2 * 500)  # 500 people/km²
+        affected_area_km2 = results.get("affected_area_km2")
+        if affected_area_km2 is None:
+            affected_area_km2 = math.pi * critical_radius * critical_radius
+        est_population = int(affected_area_km2 * _POP_PER_KM2)
         
         affected_metrics = {
             "est_population": est_population,
             "affected_area_km2": round(affected_area_km2, 2),
-            "agri_land_acres": round(affected_area_km2 * 0.4 * 247.105, 1),
+            "agri_land_acres": round(affected_area_km2 * _FARM_ACRES_PER_KM2, 1),
             "emission_rate_kg_s": results.get("emission_rate_kg_s", 0),
             "total_release_kg": results.get("total_release_kg", 0),
             "max_concentration_mg_m3": round(max_concentration, 2),
@@ -206,9 +431,6 @@ async def get_risk_profile(sim_id: str):
             affected_metrics["health_risks"].append("Elevated pollutant levels")
             affected_metrics["health_risks"].append("Monitor air quality")
     
-    # Extract health risks
-    health_risks = affected_metrics.get("health_risks", [])
-    
     # Get fallout geometry
     fallout_geometry = results.get("fallout_geometry", {})
     
@@ -222,28 +444,47 @@ async def get_risk_profile(sim_id: str):
         lon = location["lon"]
         
         # Generate circular polygon
-        import numpy as np
-        coords = []
-        num_points = 32
-        km_per_degree = 111.0
-        
-        for i in range(num_points + 1):
-            angle = (i / num_points) * 2 * np.pi
-            lat_offset = (critical_radius / km_per_degree) * np.sin(angle)
-            lon_offset = (critical_radius / km_per_degree) * np.cos(angle)
-            coords.append([lon + lon_offset, lat + lat_offset])
+        radius_deg = critical_radius / KM_PER_DEGREE
+        coords = np.column_stack((
+            lon + radius_deg * _CIRCLE_COS,
+            lat + radius_deg * _CIRCLE_SIN
+        )).tolist()
         
         fallout_geometry = {
             "type": "Polygon",
             "coordinates": [coords]
         }
     
-    return RiskProfileResponse(
+    # check the engine's geometry now, so a bad one fails the simulation with
+    # a clear error instead of every risk-profile request failing later
+    try:
+        _fallout_geometry_adapter.validate_python(fallout_geometry)
+    except ValidationError as e:
+        raise ValueError(f"Simulation engine returned an invalid fallout geometry: {e}") from e
+    
+    results["critical_radius_km"] = critical_radius
+    results["affected_metrics"] = affected_metrics
+    results["fallout_geometry"] = fallout_geometry
+    return results
+
+def _build_risk_profile(sim_id: str, simulation: SimulationRecord) -> RiskProfileResponse:
+    # Retrieve results from simulation (already enriched at completion)
+    results = simulation.results or {}
+    
+    if not results:
+        raise HTTPException(
+            status_code=500,
+            detail="Simulation completed but no results available"
+        )
+    
+    affected_metrics = results.get("affected_metrics", {})
+    
+    return RiskProfileResponse.model_construct(
         simulation_id=sim_id,
-        critical_radius_km=critical_radius,
-        affected_metrics=affected_metrics,
-        fallout_geometry=fallout_geometry,
-        health_risks=health_risks,
+        critical_radius_km=results.get("critical_radius_km", 0.0),
+        affected_metrics=AffectedMetrics.model_construct(**affected_metrics),
+        fallout_geometry=_fallout_geometry_adapter.validate_python(results["fallout_geometry"]),
+        health_risks=affected_metrics.get("health_risks", []),
         timestamp=datetime.now()
     )
 
@@ -255,17 +496,112 @@ async def get_simulation_status(sim_id: str):
     - **sim_id**: Simulation identifier
     """
     
-    if sim_id not in simulations_db:
+    snapshot = simulations_db.status_snapshot(sim_id)
+    if snapshot is None:
+        simulation = simulations_db.get(sim_id)
+        if simulation is None:
+            raise HTTPException(status_code=404, detail="Simulation not found")
+        return _status_response(sim_id, simulation)
+    
+    status, progress, current_step, error = snapshot
+    return SimulationStatus.model_construct(
+        simulation_id=sim_id,
+        status=status,
+        progress_percentage=progress,
+        current_step=current_step,
+        error_message=error
+    )
+
+@router.get("/status/{sim_id}/wait", response_model=SimulationStatus)
+async def wait_for_simulation(
+    sim_id: str,
+    timeout: float = Query(30.0, gt=0, le=120, description="Seconds to wait for completion")
+):
+    """
+    Block until the simulation finishes (or the timeout passes), then return its status
+    
+    - **sim_id**: Simulation identifier
+    - **timeout**: Maximum seconds to wait
+    """
+    
+    simulation = simulations_db.get(sim_id)
+    if simulation is None:
         raise HTTPException(status_code=404, detail="Simulation not found")
     
-    simulation = simulations_db[sim_id]
+    event = simulation_events.get(sim_id)
+    if event is not None:
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        # the record may have expired while we waited
+        simulation = simulations_db.get(sim_id)
+        if simulation is None:
+            raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    return _status_response(sim_id, simulation)
+
+@router.get("/status/{sim_id}/stream")
+async def stream_simulation_status(sim_id: str):
+    """
+    Stream status changes as server-sent events until the simulation finishes
+    
+    - **sim_id**: Simulation identifier
+    """
     
-    return SimulationStatus(
+    if sim_id not in simulations_db:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    return StreamingResponse(
+        _status_stream(sim_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _status_stream(sim_id: str):
+    updates = simulation_updates.get(sim_id)
+    sent = None
+    while True:
+        simulation = simulations_db.get(sim_id)
+        if simulation is None:
+            return
+        
+        state = (simulation.status, simulation.progress, simulation.current_step)
+        if state != sent:
+            sent = state
+            frame = {
+                "status": simulation.status,
+                "progress": simulation.progress,
+                "current_step": simulation.current_step,
+                "error_message": simulation.error
+            }
+            yield f"data: {json.dumps(frame)}\n\n"
+            if simulation.status in TERMINAL_STATUSES or updates is None:
+                return
+            # re-check rather than wait: the state may have moved while this
+            # frame was being sent
+            continue
+        
+        try:
+            await asyncio.wait_for(updates.wait(), timeout=SSE_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            yield ": keepalive\n\n"
+
+def _publish_progress(simulation_id: str):
+    simulations_db.publish_status(simulation_id)
+    updates = simulation_updates.get(simulation_id)
+    if updates is not None:
+        # wakes every current waiter; later waiters block until the next change
+        updates.set()
+        updates.clear()
+
+def _status_response(sim_id: str, simulation: SimulationRecord) -> SimulationStatus:
+    return SimulationStatus.model_construct(
         simulation_id=sim_id,
-        status=simulation["status"],
-        progress_percentage=simulation.get("progress", 0),
-        current_step=simulation.get("current_step", "Initializing"),
-        error_message=simulation.get("error", None)
+        status=simulation.status,
+        progress_percentage=simulation.progress,
+        current_step=simulation.current_step,
+        error_message=simulation.error
     )
 
 @router.get("/list")
@@ -280,15 +616,14 @@ async def list_simulations(
     - **limit**: Maximum number of results
     """
     
-    simulations = list(simulations_db.values())
+    total, simulations = simulations_db.query(status, limit)
     
-    if status:
-        simulations = [s for s in simulations if s["status"] == status]
-    
-    return {
-        "total": len(simulations),
-        "simulations": simulations[:limit]
-    }
+    # orjson encodes the dataclass records, datetimes and NumPy values in the
+    # results natively, so skip FastAPI's jsonable_encoder walk
+    return ORJSONResponse({
+        "total": total,
+        "simulations": simulations
+    })
 
 async def run_simulation(
     simulation_id: str,
@@ -304,47 +639,65 @@ async def run_simulation(
         simulation = simulations_db[simulation_id]
         
         # Step 1: Initialize simulation service
-        simulation["current_step"] = "Initializing simulation engine"
-        simulation["progress"] = 10
+        simulation.current_step = "Initializing simulation engine"
+        simulation.progress = 10
+        _publish_progress(simulation_id)
         logger.info(f"[{simulation_id}] Initializing")
         
-        service = SimulationService()
+        loop = asyncio.get_running_loop()
+        
+        # first use loads facility and weather data; keep that off the loop too
+        service = await loop.run_in_executor(simulation_executor, get_simulation_service)
         
         # Step 2: Run simulation
-        simulation["current_step"] = "Running simulation model"
-        simulation["progress"] = 40
+        simulation.current_step = "Running simulation model"
+        simulation.progress = 40
+        _publish_progress(simulation_id)
         logger.info(f"[{simulation_id}] Running model")
         
-        results = service.run_simulation(
-            site_id=site_id,
-            calamity_type=calamity_type,
-            magnitude=magnitude,
-            meteorological_override=meteo_override
+        # the models are CPU-bound; run them in a worker thread so status
+        # requests are still served meanwhile
+        results = await loop.run_in_executor(
+            simulation_executor,
+            partial(
+                service.run_simulation,
+                site_id=site_id,
+                calamity_type=calamity_type,
+                magnitude=magnitude,
+                meteorological_override=meteo_override
+            )
         )
         
         # Step 3: Process results
-        simulation["current_step"] = "Processing results"
-        simulation["progress"] = 80
+        simulation.current_step = "Processing results"
+        simulation.progress = 80
+        _publish_progress(simulation_id)
         logger.info(f"[{simulation_id}] Processing results")
         
         if results.get("status") == "completed":
             # Store results
-            simulation["results"] = results
-            simulation["status"] = "COMPLETED"
-            simulation["progress"] = 100
-            simulation["current_step"] = "Completed"
+            simulation.results = _enrich_results(results)
+            simulation.completed_at = datetime.now()
+            simulations_db.set_status(simulation_id, "COMPLETED")
+            simulation.progress = 100
+            simulation.current_step = "Completed"
             logger.info(f"[{simulation_id}] Completed successfully")
         else:
-            simulation["status"] = "FAILED"
-            simulation["error"] = results.get("error", "Unknown error")
-            simulation["current_step"] = "Failed"
-            logger.error(f"[{simulation_id}] Failed: {simulation['error']}")
+            simulations_db.set_status(simulation_id, "FAILED")
+            simulation.error = results.get("error", "Unknown error")
+            simulation.current_step = "Failed"
+            logger.error(f"[{simulation_id}] Failed: {simulation.error}")
         
     except Exception as e:
         logger.error(f"[{simulation_id}] Exception: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
-        simulation["status"] = "FAILED"
-        simulation["error"] = str(e)
-        simulation["current_step"] = "Failed"
-        simulation["progress"] = 0
\ No newline at end of file
+        simulations_db.set_status(simulation_id, "FAILED")
+        simulation.error = str(e)
+        simulation.current_step = "Failed"
+        simulation.progress = 0
+    finally:
+        _publish_progress(simulation_id)
+        event = simulation_events.get(simulation_id)
+        if event is not None:
+            event.set()
@@ -1,10 +1,25 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Mapping, Optional
+from types import MappingProxyType
 
-from src.predict_toxicity.services.terrain_service import TerrainService
+from src.predict_toxicity.services.terrain_service import TerrainService, get_terrain_service
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+_DIRECTION_NAMES: Mapping[int, str] = MappingProxyType({
+    0: "No flow",
+    1: "East",
+    2: "Southeast",
+    3: "South",
+    4: "Southwest",
+    5: "West",
+    6: "Northwest",
+    7: "North",
+    8: "Northeast"
+})
+_ASPECT_DIRECTIONS = ("N", "NE", "E", "SE", "S", "SW", "W", "NW")
 
 class ElevationResponse(BaseModel):
     """Elevation data response"""
@@ -22,7 +37,8 @@ class TerrainProfile(BaseModel):
 @router.get("/elevation", response_model=ElevationResponse)
 async def get_elevation(
     lat: float = Query(..., description="Latitude"),
-    lon: float = Query(..., description="Longitude")
+    lon: float = Query(..., description="Longitude"),
+    service: TerrainService = Depends(get_terrain_service)
 ):
     """
     Get elevation at a specific point
@@ -31,13 +47,12 @@ async def get_elevation(
     - **lon**: Longitude
     """
     
-    service = TerrainService()
     elevation = service.get_elevation(lat, lon)
     
     if elevation is None:
         raise HTTPException(status_code=404, detail="Elevation data not available")
     
-    return ElevationResponse(
+    return ElevationResponse.model_construct(
         location={"lat": lat, "lon": lon},
         elevation_m=elevation,
         source="Copernicus DEM GLO-30"
@@ -46,7 +61,8 @@ async def get_elevation(
 @router.get("/slope")
 async def get_slope(
     lat: float = Query(..., description="Latitude"),
-    lon: float = Query(..., description="Longitude")
+    lon: float = Query(..., description="Longitude"),
+    service: TerrainService = Depends(get_terrain_service)
 ):
     """
     Get terrain slope at a specific point
@@ -55,7 +71,6 @@ async def get_slope(
     - **lon**: Longitude
     """
     
-    service = TerrainService()
     slope = service.get_slope(lat, lon)
     
     if slope is None:
@@ -70,7 +85,8 @@ async def get_slope(
 @router.get("/roughness")
 async def get_roughness(
     lat: float = Query(..., description="Latitude"),
-    lon: float = Query(..., description="Longitude")
+    lon: float = Query(..., description="Longitude"),
+    service: TerrainService = Depends(get_terrain_service)
 ):
     """
     Get terrain roughness at a specific point
@@ -79,7 +95,6 @@ async def get_roughness(
     - **lon**: Longitude
     """
     
-    service = TerrainService()
     roughness = service.get_roughness(lat, lon)
     
     if roughness is None:
@@ -93,7 +108,8 @@ async def get_roughness(
 @router.get("/flow-direction")
 async def get_flow_direction(
     lat: float = Query(..., description="Latitude"),
-    lon: float = Query(..., description="Longitude")
+    lon: float = Query(..., description="Longitude"),
+    service: TerrainService = Depends(get_terrain_service)
 ):
     """
     Get hydrological flow direction at a point
@@ -105,34 +121,22 @@ async def get_flow_direction(
     1=E, 2=SE, 3=S, 4=SW, 5=W, 6=NW, 7=N, 8=NE
     """
     
-    service = TerrainService()
     direction = service.get_flow_direction(lat, lon)
     
     if direction is None:
         raise HTTPException(status_code=404, detail="Flow direction data not available")
     
-    direction_names = {
-        0: "No flow",
-        1: "East",
-        2: "Southeast",
-        3: "South",
-        4: "Southwest",
-        5: "West",
-        6: "Northwest",
-        7: "North",
-        8: "Northeast"
-    }
-    
     return {
         "location": {"lat": lat, "lon": lon},
         "flow_direction_code": int(direction),
-        "flow_direction_name": direction_names.get(int(direction), "Unknown")
+        "flow_direction_name": _DIRECTION_NAMES.get(int(direction), "Unknown")
     }
 
 @router.get("/flow-accumulation")
 async def get_flow_accumulation(
     lat: float = Query(..., description="Latitude"),
-    lon: float = Query(..., description="Longitude")
+    lon: float = Query(..., description="Longitude"),
+    service: TerrainService = Depends(get_terrain_service)
 ):
     """
     Get flow accumulation (upstream contributing area)
@@ -141,7 +145,6 @@ async def get_flow_accumulation(
     - **lon**: Longitude
     """
     
-    service = TerrainService()
     accumulation = service.get_flow_accumulation(lat, lon)
     
     if accumulation is None:
@@ -159,7 +162,8 @@ async def get_terrain_profile(
     start_lon: float = Query(..., description="Start longitude"),
     end_lat: float = Query(..., description="End latitude"),
     end_lon: float = Query(..., description="End longitude"),
-    num_points: int = Query(100, ge=10, le=1000, description="Number of sample points")
+    num_points: int = Query(100, ge=10, le=1000, description="Number of sample points"),
+    service: TerrainService = Depends(get_terrain_service)
 ):
     """
     Get elevation profile between two points
@@ -171,18 +175,18 @@ async def get_terrain_profile(
     - **num_points**: Number of points to sample
     """
     
-    service = TerrainService()
     profile = service.get_terrain_profile(
         start_lat, start_lon, end_lat, end_lon, num_points
     )
     
-    return profile
+    return TerrainProfile.model_construct(**profile)
 
 @router.get("/watershed")
 async def get_watershed(
     lat: float = Query(..., description="Outlet point latitude"),
     lon: float = Query(..., description="Outlet point longitude"),
-    threshold: Optional[float] = Query(1000, description="Flow accumulation threshold")
+    threshold: Optional[float] = Query(1000, description="Flow accumulation threshold"),
+    service: TerrainService = Depends(get_terrain_service)
 ):
     """
     Delineate watershed for a given outlet point
@@ -192,7 +196,6 @@ async def get_watershed(
     - **threshold**: Minimum flow accumulation for stream definition
     """
     
-    service = TerrainService()
     watershed = service.delineate_watershed(lat, lon, threshold)
     
     return {
@@ -203,7 +206,8 @@ async def get_watershed(
 @router.get("/aspect")
 async def get_aspect(
     lat: float = Query(..., description="Latitude"),
-    lon: float = Query(..., description="Longitude")
+    lon: float = Query(..., description="Longitude"),
+    service: TerrainService = Depends(get_terrain_service)
 ):
     """
     Get terrain aspect (direction slope faces) at a point
@@ -212,18 +216,24 @@ async def get_aspect(
     - **lon**: Longitude
     """
     
-    service = TerrainService()
     aspect = service.get_aspect(lat, lon)
     
     if aspect is None:
         raise HTTPException(status_code=404, detail="Aspect data not available")
     
     # Convert aspect to cardinal direction
-    directions = ["N", "NE", "E", "SE", "S", "SW", "W", "NW", "N"]
     index = int((aspect + 22.5) / 45) % 8
     
     return {
         "location": {"lat": lat, "lon": lon},
         "aspect_degrees": aspect,
-        "aspect_direction": directions[index]
-    }
\ No newline at end of file
+        "aspect_direction": _ASPECT_DIRECTIONS[index]
+    }
+
+@router.post("/cache-clear")
+async def clear_terrain_cache(service: TerrainService = Depends(get_terrain_service)):
+    """
+    Drop cached point samples, e.g. after the terrain rasters are regenerated
+    """
+    
+    return {"cleared": service.cache_clear()}
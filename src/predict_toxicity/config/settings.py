@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import List
 import os
@@ -60,10 +61,13 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = True
 
-# Create settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
 
-# Ensure data directories exist
-settings.RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
-settings.PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
-settings.MODELS_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+def ensure_data_dirs():
+    """Create the data directories; called by the app lifespan and the script
+    entrypoints, never on import"""
+    s = get_settings()
+    for path in (s.RAW_DATA_DIR, s.PROCESSED_DATA_DIR, s.MODELS_DIR):
+        path.mkdir(parents=True, exist_ok=True)
@@ -1,48 +1,169 @@
 import rasterio
 import numpy as np
+from contextlib import contextmanager
+from numba import njit, prange
 from rasterio.windows import Window
+from scipy.ndimage import correlate1d, maximum_filter, minimum_filter
 from pathlib import Path
+from src.predict_toxicity.config.settings import ensure_data_dirs
+
+
+# overlapped float32 read buffer per block; roughly an L2 cache
+WORKING_SET_BYTES = 1 << 20
+
+# multi-threaded LZW decode/encode (GDAL >= 3.6)
+GDAL_THREADS = "ALL_CPUS"
+GDAL_CACHE_MB = 512
+
+# output GeoTIFF tile edge; block_shapes of common DEMs are multiples of it
+OUTPUT_TILE = 256
+
+# ESRI D8: (row offset, col offset, code), east then clockwise
+D8_OFFSETS = np.array([
+    (0, 1, 1), (1, 1, 2), (1, 0, 4), (1, -1, 8),
+    (0, -1, 16), (-1, -1, 32), (-1, 0, 64), (-1, 1, 128)
+], dtype=np.int64)
+
+
+@contextmanager
+def _open_dem(dem_path: Path):
+    """Open the DEM inside a GDAL env that also covers the output writes"""
+    with rasterio.Env(GDAL_NUM_THREADS=GDAL_THREADS, GDAL_CACHEMAX=GDAL_CACHE_MB), \
+            rasterio.open(dem_path, num_threads=GDAL_THREADS) as src:
+        yield src
+
+
+def _block_shape(src):
+    """Source's internal block size, doubled while the overlapped read still
+    fits WORKING_SET_BYTES.
+
+    Each step starts on a block boundary, but the read is widened by the
+    1-pixel halo, so it also touches the edge of the neighbouring blocks.
+    Those are decoded again unless they are still in GDAL's block cache
+    (GDAL_CACHEMAX), so larger steps mainly cut how often that happens."""
+    bh, bw = src.block_shapes[0]
+    ky = kx = 1
+
+    if bw >= src.width:
+        # stripped: grow along rows only
+        while (2 * ky * bh + 2) * (bw + 2) * 4 <= WORKING_SET_BYTES:
+            ky *= 2
+    else:
+        while (2 * ky * bh + 2) * (2 * kx * bw + 2) * 4 <= WORKING_SET_BYTES:
+            ky *= 2
+            kx *= 2
+
+    return min(ky * bh, src.height), min(kx * bw, src.width)
+
+
+def _output_meta(src, **overrides):
+    """Source profile for a tiled, compressed output raster"""
+    meta = src.meta.copy()
+    meta.update(
+        tiled=True,
+        blockxsize=OUTPUT_TILE,
+        blockysize=OUTPUT_TILE,
+        compress="LZW",
+        BIGTIFF="IF_SAFER",
+        num_threads=GDAL_THREADS,
+    )
+    meta.update(overrides)
+    return meta
 
 
-BLOCK = 512  # safer for laptops
-
-
-def _read_block(src, row, col, block):
+def _read_block(src, row, col, bh, bw):
     """Read block with 1-pixel overlap"""
     win = Window(
         max(col - 1, 0),
         max(row - 1, 0),
-        min(block + 2, src.width - col + 1),
-        min(block + 2, src.height - row + 1)
+        min(bw + 2, src.width - col + 1),
+        min(bh + 2, src.height - row + 1)
     )
     data = src.read(1, window=win).astype(np.float32)
     return data, win
 
 
+# Per-block kernels: `dem` is a NaN-masked float32 block with a 1-pixel
+# overlap; each returns the interior (two rows/cols smaller)
+
+def _slope_block(dem: np.ndarray, dx: float, dy: float) -> np.ndarray:
+    # central differences as one C pass per axis; borders cropped below
+    dzdx = correlate1d(dem, np.array([-1, 0, 1], np.float32) / (2 * dx), axis=1, mode="nearest")
+    dzdy = correlate1d(dem, np.array([-1, 0, 1], np.float32) / (2 * dy), axis=0, mode="nearest")
+
+    slope = np.hypot(dzdx[1:-1, 1:-1], dzdy[1:-1, 1:-1])
+    np.arctan(slope, out=slope)
+    return np.degrees(slope, out=slope)
+
+
+def _roughness_block(dem: np.ndarray) -> np.ndarray:
+    # 3x3 max - min; nodata can never win either filter
+    nodata = np.isnan(dem)
+    hi = maximum_filter(np.where(nodata, -np.inf, dem), size=3)[1:-1, 1:-1]
+    lo = minimum_filter(np.where(nodata, np.inf, dem), size=3)[1:-1, 1:-1]
+
+    rough = hi - lo
+    rough[np.isneginf(hi)] = np.nan  # window entirely nodata
+    return rough.astype(np.float32)
+
+
+def _flow_direction_block(dem: np.ndarray) -> np.ndarray:
+    fd = np.zeros((dem.shape[0] - 2, dem.shape[1] - 2), dtype=np.uint8)
+    _d8_kernel(dem, fd)
+    return fd
+
+
+def compute_terrain_attributes(dem_path: Path, out_dir: Path):
+    """Slope, roughness and D8 flow direction from one read of each DEM block"""
+    print(f"🗻 Computing terrain attributes: {dem_path}")
+
+    with _open_dem(dem_path) as src:
+        dx = abs(src.transform.a)
+        dy = abs(src.transform.e)
+
+        bh, bw = _block_shape(src)
+
+        meta_f = _output_meta(src, dtype="float32", nodata=np.nan, predictor=3)
+        meta_u8 = _output_meta(src, dtype="uint8", nodata=0, predictor=2)
+
+        with rasterio.open(out_dir / "slope.tif", "w", **meta_f) as slope_dst, \
+                rasterio.open(out_dir / "roughness.tif", "w", **meta_f) as rough_dst, \
+                rasterio.open(out_dir / "flow_direction.tif", "w", **meta_u8) as fd_dst:
+            for row in range(0, src.height, bh):
+                for col in range(0, src.width, bw):
+
+                    dem, win = _read_block(src, row, col, bh, bw)
+                    dem[dem == src.nodata] = np.nan
+
+                    out_win = Window(col, row, dem.shape[1] - 2, dem.shape[0] - 2)
+                    slope_dst.write(_slope_block(dem, dx, dy), 1, window=out_win)
+                    rough_dst.write(_roughness_block(dem), 1, window=out_win)
+                    fd_dst.write(_flow_direction_block(dem), 1, window=out_win)
+
+    print(f"✅ Terrain attributes saved → {out_dir}")
+
+
 def compute_slope(dem_path: Path, output_path: Path):
     print(f"🗻 Computing slope: {dem_path}")
 
-    with rasterio.open(dem_path) as src:
-        meta = src.meta.copy()
+    with _open_dem(dem_path) as src:
         dx = abs(src.transform.a)
         dy = abs(src.transform.e)
 
-        meta.update(dtype="float32", nodata=np.nan, compress="LZW")
+        bh, bw = _block_shape(src)
+        meta = _output_meta(src, dtype="float32", nodata=np.nan, predictor=3)
 
         with rasterio.open(output_path, "w", **meta) as dst:
-            for row in range(0, src.height, BLOCK):
-                for col in range(0, src.width, BLOCK):
+            for row in range(0, src.height, bh):
+                for col in range(0, src.width, bw):
 
-                    dem, win = _read_block(src, row, col, BLOCK)
+                    dem, win = _read_block(src, row, col, bh, bw)
                     dem[dem == src.nodata] = np.nan
 
-                    dzdx = (dem[1:-1, 2:] - dem[1:-1, :-2]) / (2 * dx)
-                    dzdy = (dem[2:, 1:-1] - dem[:-2, 1:-1]) / (2 * dy)
-
-                    slope = np.degrees(np.arctan(np.sqrt(dzdx**2 + dzdy**2)))
+                    slope = _slope_block(dem, dx, dy)
 
                     dst.write(
-                        slope.astype(np.float32),
+                        slope,
                         1,
                         window=Window(col, row, slope.shape[1], slope.shape[0])
                     )
@@ -53,27 +174,21 @@ def compute_slope(dem_path: Path, output_path: Path):
 def compute_roughness(dem_path: Path, output_path: Path):
     print(f"🌄 Computing roughness: {dem_path}")
 
-    with rasterio.open(dem_path) as src:
-        meta = src.meta.copy()
-        meta.update(dtype="float32", nodata=np.nan, compress="LZW")
+    with _open_dem(dem_path) as src:
+        bh, bw = _block_shape(src)
+        meta = _output_meta(src, dtype="float32", nodata=np.nan, predictor=3)
 
         with rasterio.open(output_path, "w", **meta) as dst:
-            for row in range(0, src.height, BLOCK):
-                for col in range(0, src.width, BLOCK):
+            for row in range(0, src.height, bh):
+                for col in range(0, src.width, bw):
 
-                    dem, win = _read_block(src, row, col, BLOCK)
+                    dem, win = _read_block(src, row, col, bh, bw)
                     dem[dem == src.nodata] = np.nan
 
-                    neighbors = np.stack([
-                        dem[:-2, :-2], dem[:-2, 1:-1], dem[:-2, 2:],
-                        dem[1:-1, :-2], dem[1:-1, 1:-1], dem[1:-1, 2:],
-                        dem[2:, :-2], dem[2:, 1:-1], dem[2:, 2:]
-                    ])
-
-                    rough = np.nanmax(neighbors, axis=0) - np.nanmin(neighbors, axis=0)
+                    rough = _roughness_block(dem)
 
                     dst.write(
-                        rough.astype(np.float32),
+                        rough,
                         1,
                         window=Window(col, row, rough.shape[1], rough.shape[0])
                     )
@@ -81,41 +196,45 @@ def compute_roughness(dem_path: Path, output_path: Path):
     print(f"✅ Roughness saved → {output_path}")
 
 
+# no fastmath: it would let LLVM assume the NaN checks are always false
+@njit(parallel=True, cache=True)
+def _d8_kernel(dem, out):
+    """D8 code of each interior cell of `dem` into `out` (two rows/cols smaller).
+    0 for pits, flats and cells touching nodata."""
+    h, w = dem.shape
+    for i in prange(1, h - 1):
+        for j in range(1, w - 1):
+            c = dem[i, j]
+            best_drop = 0.0
+            best_code = 0
+            for k in range(8):
+                n = dem[i + D8_OFFSETS[k, 0], j + D8_OFFSETS[k, 1]]
+                if c != c or n != n:
+                    best_code = 0
+                    break
+                drop = c - n
+                # strict: ties keep the first direction, like argmax
+                if drop > best_drop:
+                    best_drop = drop
+                    best_code = D8_OFFSETS[k, 2]
+            out[i - 1, j - 1] = best_code
+
+
 def compute_flow_direction(dem_path: Path, output_path: Path):
     print(f"💧 Computing flow direction (D8): {dem_path}")
 
-    # ESRI D8
-    directions = np.array([
-        (0, 1, 1), (1, 1, 2), (1, 0, 4), (1, -1, 8),
-        (0, -1, 16), (-1, -1, 32), (-1, 0, 64), (-1, 1, 128)
-    ])
-
-    with rasterio.open(dem_path) as src:
-        meta = src.meta.copy()
-        meta.update(dtype="uint8", nodata=0, compress="LZW")
+    with _open_dem(dem_path) as src:
+        bh, bw = _block_shape(src)
+        meta = _output_meta(src, dtype="uint8", nodata=0, predictor=2)
 
         with rasterio.open(output_path, "w", **meta) as dst:
-            for row in range(0, src.height, BLOCK):
-                for col in range(0, src.width, BLOCK):
+            for row in range(0, src.height, bh):
+                for col in range(0, src.width, bw):
 
-                    dem, win = _read_block(src, row, col, BLOCK)
+                    dem, win = _read_block(src, row, col, bh, bw)
                     dem[dem == src.nodata] = np.nan
 
-                    center = dem[1:-1, 1:-1]
-                    drops = []
-
-                    for dr, dc, _ in directions:
-                        neigh = dem[1+dr:1+dr+center.shape[0],
-                                    1+dc:1+dc+center.shape[1]]
-                        drops.append(center - neigh)
-
-                    drops = np.stack(drops)
-                    idx = np.argmax(drops, axis=0)
-                    max_drop = np.max(drops, axis=0)
-
-                    fd = np.zeros(center.shape, dtype=np.uint8)
-                    for i, (_, _, code) in enumerate(directions):
-                        fd[(idx == i) & (max_drop > 0)] = code
+                    fd = _flow_direction_block(dem)
 
                     dst.write(
                         fd,
@@ -127,10 +246,9 @@ def compute_flow_direction(dem_path: Path, output_path: Path):
 
 
 if __name__ == "__main__":
+    ensure_data_dirs()
     raw = Path("data/raw/terrain/elevation.tif")
     out = Path("data/processed/terrain")
     out.mkdir(parents=True, exist_ok=True)
 
-    compute_slope(raw, out / "slope.tif")
-    compute_roughness(raw, out / "roughness.tif")
-    compute_flow_direction(raw, out / "flow_direction.tif")
+    compute_terrain_attributes(raw, out)
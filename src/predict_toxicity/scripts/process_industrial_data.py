@@ -1,8 +1,65 @@
 import pandas as pd
 import os
 import geopandas as gpd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from pathlib import Path
 from shapely.geometry import Point
+from src.predict_toxicity.config.settings import ensure_data_dirs
+
+# typed at parse time, so clean files need no to_numeric passes
+NUMERIC_TYPES = {
+    'Longitude': pa.float32(),
+    'Latitude': pa.float32(),
+    'Releases': pa.float64(),
+    'reportingYear': pa.int16(),
+    'EPRTR_SectorCode': pa.int16(),
+}
+
+# pinned, so a late non-numeric value (e.g. confidentialityReason, which is
+# mixed-type) can't contradict a type inferred from the first block
+TEXT_TYPES = {
+    'PublicationDate': pa.string(),
+    'EPRTR_SectorName': pa.string(),
+    'EPRTRAnnexIMainActivity': pa.string(),
+    'FacilityInspireId': pa.string(),
+    'facilityName': pa.string(),
+    'city': pa.string(),
+    'TargetRelease': pa.string(),
+    'confidentialityReason': pa.string(),
+    'Pollutant': pa.dictionary(pa.int32(), pa.string()),
+    'countryName': pa.dictionary(pa.int32(), pa.string()),
+}
+
+# empty text cells become NaN, as with pd.read_csv
+RELEASE_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    column_types={**TEXT_TYPES, **NUMERIC_TYPES},
+    strings_can_be_null=True,
+)
+LENIENT_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    column_types={**TEXT_TYPES, **{col: pa.string() for col in NUMERIC_TYPES}},
+    strings_can_be_null=True,
+)
+
+
+# all generate_summary_statistics needs from a processed file
+SUMMARY_COLUMNS = [
+    'FacilityInspireId', 'countryName', 'EPRTR_SectorName', 'Pollutant',
+    'reportingYear', 'Releases'
+]
+
+
+def read_release_csv(file: Path) -> pd.DataFrame:
+    try:
+        return pacsv.read_csv(file, convert_options=RELEASE_CONVERT_OPTIONS).to_pandas()
+    except pa.ArrowInvalid:
+        # a stray non-numeric cell: read those columns as text and coerce per
+        # row, so only the bad cells become NaN rather than the file failing
+        df = pacsv.read_csv(file, convert_options=LENIENT_CONVERT_OPTIONS).to_pandas()
+        for col in NUMERIC_TYPES:
+            if col in df:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        return df
 
 def process_industrial_data(input_dir: Path, output_dir: Path):
     print("Processing industrial facility data...")
@@ -21,18 +78,20 @@ def process_industrial_data(input_dir: Path, output_dir: Path):
         dfs = []
         for file in air_files:
             try:
-                df = pd.read_csv(file, low_memory=False)
+                df = read_release_csv(file)
+                n_raw = len(df)
+                # clean per file so only the filtered rows are kept for concat
+                df = clean_facility_data(df)
                 df['TargetRelease'] = 'AIR'
                 dfs.append(df)
-                print(f"  Loaded: {file.name} ({len(df)} records)")
+                print(f"  Loaded: {file.name} ({n_raw} records, {len(df)} kept)")
             except Exception as e:
                 print(f"  Error loading {file.name}: {e}")
         
         if dfs:
-            air_df = pd.concat(dfs, ignore_index=True)
-            air_df = clean_facility_data(air_df)
-            output_file = output_dir / 'air_releases.csv'
-            air_df.to_csv(output_file, index=False)
+            air_df = pd.concat(dfs, ignore_index=True, copy=False)
+            output_file = output_dir / 'air_releases.parquet'
+            air_df.to_parquet(output_file, compression='zstd', index=False)
             print(f"✓ Saved processed air releases: {output_file}")
             print(f"  Total records: {len(air_df)}")
             print(f"  Unique facilities: {air_df['FacilityInspireId'].nunique()}")
@@ -45,18 +104,20 @@ def process_industrial_data(input_dir: Path, output_dir: Path):
         dfs = []
         for file in water_files:
             try:
-                df = pd.read_csv(file, low_memory=False)
+                df = read_release_csv(file)
+                n_raw = len(df)
+                # clean per file so only the filtered rows are kept for concat
+                df = clean_facility_data(df)
                 df['TargetRelease'] = 'WATER'
                 dfs.append(df)
-                print(f"  Loaded: {file.name} ({len(df)} records)")
+                print(f"  Loaded: {file.name} ({n_raw} records, {len(df)} kept)")
             except Exception as e:
                 print(f"  Error loading {file.name}: {e}")
         
         if dfs:
-            water_df = pd.concat(dfs, ignore_index=True)
-            water_df = clean_facility_data(water_df)
-            output_file = output_dir / 'water_releases.csv'
-            water_df.to_csv(output_file, index=False)
+            water_df = pd.concat(dfs, ignore_index=True, copy=False)
+            output_file = output_dir / 'water_releases.parquet'
+            water_df.to_parquet(output_file, compression='zstd', index=False)
             print(f"✓ Saved processed water releases: {output_file}")
             print(f"  Total records: {len(water_df)}")
             print(f"  Unique facilities: {water_df['FacilityInspireId'].nunique()}")
@@ -70,12 +131,6 @@ def clean_facility_data(df: pd.DataFrame) -> pd.DataFrame:
         .copy()
     )
 
-    df.loc[:, 'reportingYear'] = pd.to_numeric(df['reportingYear'], errors='coerce')
-    df.loc[:, 'Longitude'] = pd.to_numeric(df['Longitude'], errors='coerce')
-    df.loc[:, 'Latitude'] = pd.to_numeric(df['Latitude'], errors='coerce')
-    df.loc[:, 'Releases'] = pd.to_numeric(df['Releases'], errors='coerce')
-    df.loc[:, 'EPRTR_SectorCode'] = pd.to_numeric(df['EPRTR_SectorCode'], errors='coerce')
-
     df = df.loc[
         (df['Longitude'].between(-180, 180)) &
         (df['Latitude'].between(-90, 90)) &
@@ -104,7 +159,7 @@ def generate_summary_statistics(df: pd.DataFrame) -> dict:
         'year_range': (int(df['reportingYear'].min()), int(df['reportingYear'].max())),
         'total_releases': float(df['Releases'].sum()),
         'top_countries': df['countryName'].value_counts().head(10).to_dict(),
-        'top_pollutants': df.groupby('Pollutant')['Releases'].sum()\
+        'top_pollutants': df.groupby('Pollutant', observed=True)['Releases'].sum()\
             .sort_values(ascending=False).head(10).to_dict(),
         'top_sectors': df['EPRTR_SectorName'].value_counts().head(5).to_dict()
     }
@@ -112,6 +167,7 @@ def generate_summary_statistics(df: pd.DataFrame) -> dict:
     return stats
 
 if __name__ == "__main__":
+    ensure_data_dirs()
     input_dir = Path("data/raw/industrial")
     output_dir = Path("data/processed/industrial")
 
@@ -124,18 +180,18 @@ if __name__ == "__main__":
     print("SUMMARY STATISTICS")
     print("=" * 50)
 
-    air_file = output_dir / "air_releases.csv"
-    water_file = output_dir / "water_releases.csv"
+    air_file = output_dir / "air_releases.parquet"
+    water_file = output_dir / "water_releases.parquet"
 
     if air_file.exists():
-        air_df = pd.read_csv(air_file)
+        air_df = pd.read_parquet(air_file, columns=SUMMARY_COLUMNS)
         print("\n📊 AIR RELEASES:")
         stats = generate_summary_statistics(air_df)
         for key, value in stats.items():
             print(f"  {key}: {value}")
 
     if water_file.exists():
-        water_df = pd.read_csv(water_file)
+        water_df = pd.read_parquet(water_file, columns=SUMMARY_COLUMNS)
         print("\n📊 WATER RELEASES:")
         stats = generate_summary_statistics(water_df)
         for key, value in stats.items():
@@ -3,6 +3,7 @@ import numpy as np
 import json
 from pathlib import Path
 from dask.diagnostics import ProgressBar
+from src.predict_toxicity.config.settings import ensure_data_dirs
 
 
 def process_era5_fast(input_path: Path, output_dir: Path):
@@ -60,6 +61,7 @@ def process_era5_fast(input_path: Path, output_dir: Path):
 
 
 if __name__ == "__main__":
+    ensure_data_dirs()
     input_file = Path("data/raw/meteorological/data_stream.nc")
     output_dir = Path("data/processed/meteorological")
 
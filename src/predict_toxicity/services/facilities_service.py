@@ -4,7 +4,7 @@ from shapely.geometry import Point
 from typing import List, Dict, Optional
 from src.logging import logging as logger
 
-from src.predict_toxicity.config.settings import settings
+from src.predict_toxicity.config.settings import get_settings
 
 class FacilitiesService:
     def __init__(self):
@@ -13,6 +13,7 @@ class FacilitiesService:
         self._load_data()
     
     def _load_data(self):
+        settings = get_settings()
         try:
             # Load air releases with dtype specification to avoid warnings
             if settings.INDUSTRIAL_AIR_RELEASES_PATH.exists():
@@ -252,4 +253,15 @@ class FacilitiesService:
             "activity": first_row['EPRTRAnnexIMainActivity'],
             "reporting_year": int(first_row['reportingYear']),
             "pollutants": pollutants
-        }
\ No newline at end of file
+        }
+
+
+_facilities_service: Optional[FacilitiesService] = None
+
+
+def get_facilities_service() -> FacilitiesService:
+    """Process-wide instance, so the release tables are loaded once"""
+    global _facilities_service
+    if _facilities_service is None:
+        _facilities_service = FacilitiesService()
+    return _facilities_service
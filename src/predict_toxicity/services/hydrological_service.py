@@ -5,13 +5,14 @@ from pathlib import Path
 from shapely.geometry import Point, Polygon
 import geopandas as gpd
 from src.logging import logging as logger
-from src.predict_toxicity.config.settings import settings
+from src.predict_toxicity.config.settings import get_settings
 
 
 class HydrologicalService:
     """Service for hydrological flow modeling and flood simulation"""
     
     def __init__(self):
+        settings = get_settings()
         self.flow_direction_path = settings.FLOW_DIRECTION_PATH
         self.flow_accumulation_path = settings.FLOW_ACCUMULATION_PATH
         self.dem_path = settings.DEM_PATH
@@ -91,7 +92,7 @@ class HydrologicalService:
         # Empirical relationship: radius increases with flood depth
         base_radius = 2.0  # km
         radius = base_radius * (1 + magnitude * 0.5)
-        return min(radius, settings.MAX_SIMULATION_RADIUS_KM)
+        return min(radius, get_settings().MAX_SIMULATION_RADIUS_KM)
     
     def _trace_flow_paths(
         self,
@@ -5,14 +5,14 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from src.logging import logging as logger
-from src.predict_toxicity.config.settings import settings
+from src.predict_toxicity.config.settings import get_settings
 
 
 class MeteorologicalService:
     """Service for meteorological data access and processing"""
     
     def __init__(self):
-        self.era5_path = settings.ERA5_DATA_PATH
+        self.era5_path = get_settings().ERA5_DATA_PATH
         self.dataset = None
         self._load_dataset()
     
@@ -342,4 +342,15 @@ class MeteorologicalService:
         
         mixing_height = 0.3 * friction_velocity / f
         
-        return max(100, min(mixing_height, 3000))
\ No newline at end of file
+        return max(100, min(mixing_height, 3000))
+
+
+_meteorological_service: Optional[MeteorologicalService] = None
+
+
+def get_meteorological_service() -> MeteorologicalService:
+    """Process-wide instance, so the ERA5 dataset is opened once"""
+    global _meteorological_service
+    if _meteorological_service is None:
+        _meteorological_service = MeteorologicalService()
+    return _meteorological_service
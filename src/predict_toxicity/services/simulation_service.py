@@ -1,10 +1,10 @@
 from typing import Dict, Optional
 from src.logging import logging as logger
-from src.predict_toxicity.services.facilities_service import FacilitiesService
+from src.predict_toxicity.services.facilities_service import get_facilities_service
 from src.predict_toxicity.services.hydrological_service import HydrologicalService
 from src.predict_toxicity.services.dispersion_service import DispersionService
-from src.predict_toxicity.services.meteorological_service import MeteorologicalService
-from src.predict_toxicity.services.terrain_service import TerrainService
+from src.predict_toxicity.services.meteorological_service import get_meteorological_service
+from src.predict_toxicity.services.terrain_service import get_terrain_service
 
 
 class SimulationService:
@@ -14,11 +14,11 @@ class SimulationService:
     """
     
     def __init__(self):
-        self.facilities_service = FacilitiesService()
+        self.facilities_service = get_facilities_service()
         self.hydro_service = HydrologicalService()
         self.dispersion_service = DispersionService()
-        self.meteo_service = MeteorologicalService()
-        self.terrain_service = TerrainService()
+        self.meteo_service = get_meteorological_service()
+        self.terrain_service = get_terrain_service()
         
         logger.info("SimulationService initialized")
     
@@ -365,4 +365,15 @@ class SimulationService:
             "pollutant_types": list(pollutant_types),
             "risk_score": round(risk_score, 1),
             "risk_level": risk_level
-        }
\ No newline at end of file
+        }
+
+
+_simulation_service: Optional[SimulationService] = None
+
+
+def get_simulation_service() -> SimulationService:
+    """Process-wide instance shared by all simulation runs"""
+    global _simulation_service
+    if _simulation_service is None:
+        _simulation_service = SimulationService()
+    return _simulation_service
@@ -1,21 +1,45 @@
 import rasterio
 import numpy as np
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from shapely.geometry import Point
 from src.logging import logging as logger
-from src.predict_toxicity.config.settings import settings
+from src.predict_toxicity.config.settings import get_settings
+
+# point lookups are cached on coordinates rounded to ~1 m, well inside one
+# 30 m DEM cell, so nearby repeat queries hit the cache
+SAMPLE_CACHE_SIZE = 16384
+COORD_DECIMALS = 5
+
+# above this many pixels, the bounding window of the query points is mostly
+# unused raster; sample the points one cell at a time instead
+MAX_SAMPLE_WINDOW_PIXELS = 1 << 20
 
 
 class TerrainService:
     """Service for terrain data access and analysis"""
     
     def __init__(self):
+        settings = get_settings()
         self.dem_path = settings.DEM_PATH
         self.slope_path = settings.SLOPE_PATH
         self.roughness_path = settings.ROUGHNESS_PATH
         self.flow_direction_path = settings.FLOW_DIRECTION_PATH
         self.flow_accumulation_path = settings.FLOW_ACCUMULATION_PATH
+        self._sample_cached = lru_cache(maxsize=SAMPLE_CACHE_SIZE)(self._read_raster_value)
+        self._aspect_cached = lru_cache(maxsize=SAMPLE_CACHE_SIZE)(self._compute_aspect)
+    
+    def cache_clear(self) -> Dict[str, int]:
+        """Drop cached point samples (e.g. after the rasters are regenerated)"""
+        
+        cleared = {
+            "samples": self._sample_cached.cache_info().currsize,
+            "aspects": self._aspect_cached.cache_info().currsize
+        }
+        self._sample_cached.cache_clear()
+        self._aspect_cached.cache_clear()
+        return cleared
     
     def get_elevation(self, lat: float, lon: float) -> Optional[float]:
         """
@@ -112,18 +136,16 @@ class TerrainService:
                 start_lat, start_lon, end_lat, end_lon, num_points
             )
         
-        points = []
-        elevations = []
+        lats = np.linspace(start_lat, end_lat, num_points)
+        lons = np.linspace(start_lon, end_lon, num_points)
+        elevations = self._sample_points(self.dem_path, lats, lons)
         
-        for i in range(num_points):
-            t = i / (num_points - 1)
-            lat = start_lat + t * (end_lat - start_lat)
-            lon = start_lon + t * (end_lon - start_lon)
-            
-            elev = self.get_elevation(lat, lon)
-            if elev is not None:
-                points.append({"lat": lat, "lon": lon, "elevation_m": elev})
-                elevations.append(elev)
+        valid = ~np.isnan(elevations)
+        elevations = elevations[valid]
+        points = [
+            {"lat": lat, "lon": lon, "elevation_m": elev}
+            for lat, lon, elev in zip(lats[valid].tolist(), lons[valid].tolist(), elevations.tolist())
+        ]
         
         # Calculate distance
         from math import radians, sin, cos, sqrt, atan2
@@ -140,10 +162,9 @@ class TerrainService:
         total_distance = R * c
         
         # Calculate elevation gain/loss
-        elevation_gain = sum(max(0, elevations[i+1] - elevations[i]) 
-                           for i in range(len(elevations)-1))
-        elevation_loss = sum(max(0, elevations[i] - elevations[i+1]) 
-                           for i in range(len(elevations)-1))
+        steps = np.diff(elevations)
+        elevation_gain = float(steps[steps > 0].sum())
+        elevation_loss = float(-steps[steps < 0].sum())
         
         return {
             "points": points,
@@ -214,6 +235,9 @@ class TerrainService:
             Aspect in degrees (0-360)
         """
         
+        return self._aspect_cached(round(lat, COORD_DECIMALS), round(lon, COORD_DECIMALS))
+    
+    def _compute_aspect(self, lat: float, lon: float) -> Optional[float]:
         if not self.dem_path.exists():
             return None
         
@@ -266,6 +290,17 @@ class TerrainService:
             Sampled value or None
         """
         
+        return self._sample_cached(
+            raster_path, round(lat, COORD_DECIMALS), round(lon, COORD_DECIMALS), dtype
+        )
+    
+    def _read_raster_value(
+        self,
+        raster_path: Path,
+        lat: float,
+        lon: float,
+        dtype=float
+    ) -> Optional[float]:
         if not raster_path.exists():
             logger.warning(f"Raster not found: {raster_path}")
             return None
@@ -277,7 +312,8 @@ class TerrainService:
                 
                 # Check bounds
                 if (0 <= row < src.height) and (0 <= col < src.width):
-                    value = src.read(1)[row, col]
+                    # read just this cell, not the whole band
+                    value = src.read(1, window=rasterio.windows.Window(col, row, 1, 1))[0, 0]
                     
                     # Check for nodata
                     if src.nodata is not None and value == src.nodata:
@@ -291,6 +327,64 @@ class TerrainService:
             logger.error(f"Error sampling raster {raster_path}: {e}")
             return None
     
+    def _sample_points(
+        self,
+        raster_path: Path,
+        lats: np.ndarray,
+        lons: np.ndarray
+    ) -> np.ndarray:
+        """
+        Sample many points from one raster with a single windowed read, or
+        with per-point reads when the points are too spread out for that
+        
+        Args:
+            raster_path: Path to raster file
+            lats: Latitudes
+            lons: Longitudes
+            
+        Returns:
+            Values as float64, NaN where outside the raster or nodata
+        """
+        
+        values = np.full(len(lats), np.nan)
+        if not raster_path.exists():
+            logger.warning(f"Raster not found: {raster_path}")
+            return values
+        
+        try:
+            with rasterio.open(raster_path) as src:
+                rows, cols = rasterio.transform.rowcol(src.transform, lons, lats)
+                rows, cols = np.asarray(rows), np.asarray(cols)
+                
+                inside = (rows >= 0) & (rows < src.height) & (cols >= 0) & (cols < src.width)
+                if not inside.any():
+                    return values
+                rows, cols = rows[inside], cols[inside]
+                
+                row0, col0 = rows.min(), cols.min()
+                height = rows.max() - row0 + 1
+                width = cols.max() - col0 + 1
+                
+                if height * width <= MAX_SAMPLE_WINDOW_PIXELS:
+                    # the bounding window of all points, read once
+                    window = rasterio.windows.Window(col0, row0, width, height)
+                    block = src.read(1, window=window)
+                    sampled = block[rows - row0, cols - col0].astype(np.float64)
+                else:
+                    sampled = np.array([
+                        src.read(1, window=rasterio.windows.Window(col, row, 1, 1))[0, 0]
+                        for row, col in zip(rows.tolist(), cols.tolist())
+                    ], dtype=np.float64)
+                
+                if src.nodata is not None:
+                    sampled[sampled == src.nodata] = np.nan
+                values[inside] = sampled
+                
+        except Exception as e:
+            logger.error(f"Error sampling raster {raster_path}: {e}")
+        
+        return values
+    
     def _generate_synthetic_profile(
         self,
         start_lat: float,
@@ -380,4 +474,15 @@ class TerrainService:
                 
         except Exception as e:
             logger.error(f"Error calculating ruggedness: {e}")
-            return 0.0
\ No newline at end of file
+            return 0.0
+
+
+_terrain_service: Optional[TerrainService] = None
+
+
+def get_terrain_service() -> TerrainService:
+    """Process-wide instance, so its point-sample cache is shared"""
+    global _terrain_service
+    if _terrain_service is None:
+        _terrain_service = TerrainService()
+    return _terrain_service
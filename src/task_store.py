@@ -0,0 +1,47 @@
+import os
+from collections import OrderedDict
+from typing import Any, Iterable
+
+# finished tasks beyond this many are dropped, oldest first
+MAX_TASKS = int(os.getenv("MAX_TASKS", "1000"))
+
+# TaskStatus enums subclass str, so these compare equal to their members
+FINISHED_STATUSES = ("COMPLETED", "FAILED")
+
+
+class TaskStore(OrderedDict):
+    """
+    In-memory task records keyed by `task_id`, oldest first.
+
+    Once more than `max_tasks` are stored, `add` drops the oldest finished
+    tasks. Running tasks are skipped rather than evicted, so a stuck task at
+    the head never stalls eviction of the finished ones behind it.
+    """
+
+    def __init__(
+        self,
+        *args,
+        finished: Iterable[Any] = FINISHED_STATUSES,
+        max_tasks: int = MAX_TASKS,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.finished = tuple(finished)
+        self.max_tasks = max_tasks
+
+    def add(self, task: Any):
+        self[task.task_id] = task
+
+        excess = len(self) - self.max_tasks
+        if excess <= 0:
+            return
+
+        stale = []
+        for task_id, stored in self.items():
+            if stored.status in self.finished:
+                stale.append(task_id)
+                if len(stale) == excess:
+                    break
+
+        for task_id in stale:
+            del self[task_id]
@@ -0,0 +1,70 @@
+import json
+
+import joblib
+import numpy as np
+import xgboost as xgb
+import yaml
+
+from src.chemical_analysis.component.fine_tuning05 import FineTuning
+from src.chemical_analysis.inference.pipeline import InferencePipeline
+
+TARGETS = ["N", "P", "K", "pH"]
+
+
+def _setup(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 15)).astype(np.float32)
+    y = np.column_stack([X @ rng.normal(size=15) for _ in TARGETS]).astype(np.float32)
+    np.save(tmp_path / "X.npy", X)
+    np.save(tmp_path / "y.npy", y)
+
+    models_dir = tmp_path / "artifacts" / "models"
+    models_dir.mkdir(parents=True)
+    for i, target in enumerate(TARGETS):
+        model = xgb.XGBRegressor(n_estimators=10, max_depth=6, learning_rate=0.3)
+        joblib.dump(model.fit(X, y[:, i]), models_dir / f"xgb_{target}.joblib")
+
+    params = {f"{t}_FT": {"n_estimators": 5, "max_depth": 2, "lr": 0.01} for t in TARGETS}
+    (tmp_path / "params.yaml").write_text(yaml.safe_dump(params))
+    return X
+
+
+def _depth(tree: dict) -> int:
+    return 1 + max(map(_depth, tree["children"])) if "children" in tree else 0
+
+
+def test_finetuned_booster_uses_ft_params_and_round_trips(tmp_path, monkeypatch, caplog):
+    X = _setup(tmp_path)
+    finetuned_dir = tmp_path / "artifacts" / "finetuned_models"
+
+    finetuner = FineTuning(
+        X_path=str(tmp_path / "X.npy"),
+        y_path=str(tmp_path / "y.npy"),
+        params_path=str(tmp_path / "params.yaml"),
+        pretrained_models_dir=str(tmp_path / "artifacts" / "models"),
+        finetuned_models_dir=str(finetuned_dir),
+        metrics_path=str(tmp_path / "metrics.txt"),
+    )
+    with caplog.at_level("INFO"):
+        finetuner._finetune_one(0, "N")
+
+    # the FT values, not the pretrained eta=0.3/max_depth=6, were in effect
+    assert "N: 15 trees, eta=0.01, max_depth=2" in caplog.text
+
+    # save_model keeps the trees (not the training params): the pretrained
+    # ones plus the shallower fine-tuning rounds appended after them
+    saved = xgb.Booster(model_file=str(finetuned_dir / "xgb_N_finetuned.ubj"))
+    trees = [json.loads(t) for t in saved.get_dump(dump_format="json")]
+    assert len(trees) == 10 + 5
+    assert max(_depth(t) for t in trees[:10]) > 2
+    assert max(_depth(t) for t in trees[10:]) <= 2
+    assert json.loads(saved.save_config())["learner"]["objective"]["name"] == "reg:squarederror"
+
+    # the inference pipeline loads the same file as a plain booster
+    monkeypatch.chdir(tmp_path)
+    pipeline = InferencePipeline.__new__(InferencePipeline)
+    pipeline.use_finetuned = True
+    pipeline.target_cols = TARGETS
+    loaded = pipeline._load_one_model("N")
+
+    np.testing.assert_array_equal(loaded.inplace_predict(X), saved.inplace_predict(X))
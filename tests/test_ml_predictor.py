@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from src.DisplacementDetector.ml_predictor import DisplacementPredictor
+
+FEATURES = ["days", "month", "doy", "lag1", "lag2", "lag3", "roll_mean_3", "trend"]
+
+
+def test_feature_matrix_matches_create_features_on_gappy_series():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2019-01-03", periods=40, freq="6D").to_numpy()
+
+    D = rng.normal(0, 5, (6, len(dates))).astype(np.float32)
+    D[0, [0, 1, 7, 8, 20]] = np.nan       # gaps at the start and inside
+    D[1, 15:] = np.nan                    # series ends early
+    D[2, ::3] = np.nan                    # regular gaps
+    D[4, :] = np.nan                      # nothing valid
+    D[5, 2:] = np.nan                     # too short for any window
+
+    feats, target, valid = DisplacementPredictor.create_feature_matrix(D, dates)
+
+    # create_features doesn't touch self
+    predictor = DisplacementPredictor.__new__(DisplacementPredictor)
+    for i, row in enumerate(D):
+        mask = ~np.isnan(row)
+        ts = pd.DataFrame({"date": dates[mask], "displacement": row[mask].astype(np.float64)})
+        expected = predictor.create_features(ts)
+
+        assert valid[i].sum() == len(expected)
+        np.testing.assert_allclose(
+            feats[i][valid[i]], expected[FEATURES].to_numpy(), rtol=1e-5, atol=1e-4
+        )
+        np.testing.assert_allclose(
+            target[i][valid[i]], expected["displacement"].to_numpy(), rtol=1e-6
+        )